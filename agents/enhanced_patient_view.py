@@ -2,16 +2,185 @@
 AI-Powered Patient View with Test Results Explainer Integration
 Combines all AI agents including the new test results explainer
 """
-from typing import Dict, Any
-import json
+from typing import Dict, Optional
+import copy
+import math
+import time
+import logging
 import asyncio
+import hashlib
 from datetime import datetime
+import orjson
 
 # Import the test results explainer
 from agents.test_results_explainer import generate_patient_explanation
 
+_log = logging.getLogger(__name__)
+
+# Minimal safe response when the enhanced view can't be built
+_SAFE_FALLBACK = {
+    'success': True,
+    'alert': {
+        'show_alert': False,
+        'severity': 'low',
+        'message': 'Please consult with your healthcare provider'
+    },
+    'admission': {
+        'needs_admission': False,
+        'reason': 'To be determined by your doctor'
+    },
+    'cost': {
+        'total_estimated': 0,
+        'message': 'Cost information unavailable'
+    },
+    'options': {
+        'recommended_action': 'Please see your healthcare provider for a complete evaluation'
+    },
+    'test_results_explanation': {
+        'greeting': 'Hello! Your test results are being processed.',
+        'executive_summary': 'Please speak with your healthcare provider for a detailed explanation of your results.'
+    }
+}
+
+# LLM explanations are the slow part of the view - identical analyses reuse
+# the previous explanation for a while instead of asking the model again
+_EXPLANATION_TTL = 900  # seconds
+_EXPLANATION_CACHE_SIZE = 1024
+_explanation_cache: Dict[bytes, tuple] = {}  # key -> (expires_at, explanation)
+_explanation_locks: Dict[bytes, list] = {}  # key -> [lock, requests using it]
+
+# The parts of an analysis generate_patient_explanation reads. The raw conversation
+# (per-message ids and timestamps) and the timing fields differ on every run, so
+# they stay out of the key
+_EXPLANATION_INPUTS = ('patient', 'consensus', 'detailed_findings', 'agent_communication')
+
+def _explanation_key(analysis_data: Dict) -> Optional[bytes]:
+    """Stable digest of the explainer's inputs, or None if they can't be serialized"""
+    try:
+        payload = orjson.dumps(
+            {field: analysis_data.get(field) for field in _EXPLANATION_INPUTS},
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=str
+        )
+    except TypeError:
+        return None
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+def _purge_expired_explanations(now: float):
+    """Drop expired explanations"""
+    expired = [key for key, (expires_at, _) in _explanation_cache.items() if expires_at <= now]
+    for key in expired:
+        del _explanation_cache[key]
+
+async def _cached_patient_explanation(analysis_data: Dict) -> Dict:
+    """
+    generate_patient_explanation with a TTL cache keyed on the analysis content
+    """
+    key = _explanation_key(analysis_data)
+    if key is None:
+        return await generate_patient_explanation(analysis_data)
+    
+    # One lock per key so concurrent requests for the same case share a single LLM call.
+    # The lock lives as long as some request holds or waits on it - dropping it any
+    # earlier would let a newcomer start a second call alongside a waiter
+    entry = _explanation_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            cached = _explanation_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return dict(cached[1])
+            
+            explanation = await generate_patient_explanation(analysis_data)
+            
+            _explanation_cache.pop(key, None)
+            _purge_expired_explanations(time.monotonic())
+            if len(_explanation_cache) >= _EXPLANATION_CACHE_SIZE:
+                del _explanation_cache[next(iter(_explanation_cache))]
+            _explanation_cache[key] = (time.monotonic() + _EXPLANATION_TTL, explanation)
+            # Callers get their own copy, the cached one stays as generated
+            return dict(explanation)
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _explanation_locks[key]
+
+def _dialogue_entry(speaker: str, message: str, badge: str, badge_class: str) -> Dict:
+    return {
+        'speaker': speaker,
+        'message': message,
+        'badge': badge,
+        'badge_class': badge_class
+    }
+
+def _alert_entry(text: str) -> Optional[Dict]:
+    """Alert highlights: "🚨 <agent>: <topic>"""
+    speaker, sep, message = text.partition(':')
+    if not sep:
+        message = text
+    return _dialogue_entry(f'Dr. {speaker.strip()}', message.strip(), 'Critical Alert', 'critical')
+
+def _question_entry(text: str) -> Optional[Dict]:
+    """Question highlights: "❓ <agent> asked: <question>" (other formats are not shown)"""
+    speaker, sep, message = text.partition(' asked: ')
+    if not sep:
+        return None
+    return _dialogue_entry(f'Dr. {speaker.strip()}', message.strip().removesuffix('...'), 'Question', 'question')
+
+def _consensus_entry(text: str) -> Optional[Dict]:
+    """Consensus highlights: "🤝 Consensus reached on <topic>" or a general agreement"""
+    if 'Consensus reached on' in text:
+        return _dialogue_entry('Medical Team', text, 'Consensus', 'consensus')
+    return _dialogue_entry('Dr. Consensus', text, 'Agreement', 'consensus')
+
+def _update_entry(text: str) -> Optional[Dict]:
+    """Untagged "<speaker>: <message>" highlights"""
+    speaker, sep, message = text.partition(':')
+    if not sep:
+        return None
+    return _dialogue_entry(f'Dr. {speaker.strip()}', message.strip(), 'Update', 'info')
+
+# Every tagged highlight starts with its icon, so one character picks the parser
+_EMOJI_DISPATCH = {
+    '🚨': _alert_entry,
+    '❓': _question_entry,
+    '🤝': _consensus_entry
+}
+
+def _dialogue_from(highlight: str) -> Optional[Dict]:
+    """Turn one conversation highlight into a dialogue entry (None if not shown)"""
+    text = highlight.strip()
+    handler = _EMOJI_DISPATCH.get(text[:1])
+    if handler is None:
+        return _update_entry(text)
+    return handler(text[1:].lstrip())
+
+# Test results explanation sections: (key, title, explanation field, icon)
+_SECTION_SPEC = (
+    ('lab_results', '🔬 Your Blood Test Results', 'lab_explanation', 'flask'),
+    ('imaging', '🩻 Your X-Ray Results', 'imaging_explanation', 'x-ray'),
+    ('risk_assessment', '📊 Your Risk Assessment', 'risk_explanation', 'chart-line'),
+    ('diagnosis', '🏥 Your Diagnosis', 'diagnosis_explanation', 'stethoscope'),
+    ('treatment', '💊 Your Treatment Plan', 'treatment_rationale', 'pills'),
+    ('timeline', '📅 What to Expect', 'what_to_expect', 'calendar')
+)
+
+# Agreement level per 20-point band of the consensus score. Bands are
+# (0, 20], (20, 40], ... so the >60 / >80 cut-offs land on a band edge
+_AGREEMENT_TABLE = (
+    'Some Disagreement',
+    'Some Disagreement',
+    'Some Disagreement',
+    'Moderate Agreement',
+    'Strong Agreement'
+)
+
+def _agreement_level(consensus_score: float) -> str:
+    band = (math.ceil(consensus_score) - 1) // 20
+    return _AGREEMENT_TABLE[max(0, min(band, len(_AGREEMENT_TABLE) - 1))]
+
 # Debate visualizer removed - create inline function
-async def visualize_agent_debate(analysis_data: Dict) -> Dict:
+def visualize_agent_debate(analysis_data: Dict) -> Dict:
     """Create agent debate visualization from communication data"""
     agent_comm = analysis_data.get('agent_communication', {})
     conversation_highlights = analysis_data.get('conversation_highlights', [])
@@ -19,82 +188,34 @@ async def visualize_agent_debate(analysis_data: Dict) -> Dict:
     # Calculate consensus score based on agent agreement
     total_messages = agent_comm.get('total_messages', 0)
     consensus_topics = agent_comm.get('consensus_topics', 0)
+    questions_asked = agent_comm.get('questions_asked', 0)
+    critical_alerts = agent_comm.get('critical_alerts', 0)
+    display_total = total_messages or 5  # Team size shown to patients when nothing was logged
     consensus_score = min(100, (consensus_topics / max(1, total_messages)) * 100 + 50) if total_messages > 0 else 75
     
-    # Create example dialogue from highlights
-    example_dialogue = []
-    for highlight in conversation_highlights:  # Show ALL highlights
-        if '🚨' in highlight:
-            parts = highlight.split(':', 1)  # Split only on first colon
-            speaker = parts[0].replace('🚨', '').strip()
-            message = parts[1].strip() if len(parts) > 1 else highlight
-            example_dialogue.append({
-                'speaker': f'Dr. {speaker}',
-                'message': message,
-                'badge': 'Critical Alert',
-                'badge_class': 'critical'
-            })
-        elif '❓' in highlight:
-            # Handle the full question format
-            if ' asked: ' in highlight:
-                speaker = highlight.split(' asked: ')[0].replace('❓', '').strip()
-                message = highlight.split(' asked: ')[1]
-                # Remove the trailing '...' if present
-                if message.endswith('...'):
-                    message = message[:-3]
-                example_dialogue.append({
-                    'speaker': f'Dr. {speaker}',
-                    'message': message,
-                    'badge': 'Question',
-                    'badge_class': 'question'
-                })
-        elif '🤝' in highlight:
-            message = highlight.replace('🤝', '').strip()
-            if 'Consensus reached on' in message:
-                example_dialogue.append({
-                    'speaker': 'Medical Team',
-                    'message': message,
-                    'badge': 'Consensus',
-                    'badge_class': 'consensus'
-                })
-            else:
-                example_dialogue.append({
-                    'speaker': 'Dr. Consensus',
-                    'message': message,
-                    'badge': 'Agreement',
-                    'badge_class': 'consensus'
-                })
-        else:
-            # Handle other message types without icons
-            if ':' in highlight:
-                parts = highlight.split(':', 1)
-                speaker = parts[0].strip()
-                message = parts[1].strip() if len(parts) > 1 else highlight
-                example_dialogue.append({
-                    'speaker': f'Dr. {speaker}',
-                    'message': message,
-                    'badge': 'Update',
-                    'badge_class': 'info'
-                })
+    # Create example dialogue from highlights - Show ALL highlights
+    example_dialogue = [
+        entry for highlight in conversation_highlights
+        if (entry := _dialogue_from(highlight)) is not None
+    ]
     
     # Get full conversation log from raw data if available
-    full_conversation = []
-    raw_conversation = analysis_data.get('raw_conversation', [])
-    if raw_conversation:
-        for msg in raw_conversation:
-            full_conversation.append({
-                'timestamp': msg.get('timestamp', 'Unknown time'),
-                'agent': msg.get('agent_id', 'Unknown'),
-                'type': msg.get('type', 'message'),
-                'content': msg.get('content', msg.get('topic', 'No content')),
-                'priority': msg.get('priority', 0)
-            })
+    full_conversation = [
+        {
+            'timestamp': msg.get('timestamp', 'Unknown time'),
+            'agent': msg.get('agent_id', 'Unknown'),
+            'type': msg.get('type', 'message'),
+            'content': msg.get('content', msg.get('topic', 'No content')),
+            'priority': msg.get('priority', 0)
+        }
+        for msg in analysis_data.get('raw_conversation', [])
+    ]
     
     return {
         'show_debate_tab': total_messages > 5,  # Show tab if meaningful discussion
         'consensus_score': int(consensus_score),
-        'agreement_level': 'Strong Agreement' if consensus_score > 80 else 'Moderate Agreement' if consensus_score > 60 else 'Some Disagreement',
-        'patient_translation': f'Your medical team of {agent_comm.get("total_messages", 5)} specialists discussed your case. They asked {agent_comm.get("questions_asked", 0)} clarifying questions and raised {agent_comm.get("critical_alerts", 0)} important points before reaching their recommendation.',
+        'agreement_level': _agreement_level(consensus_score),
+        'patient_translation': f'Your medical team of {display_total} specialists discussed your case. They asked {questions_asked} clarifying questions and raised {critical_alerts} important points before reaching their recommendation.',
         'example_dialogue': example_dialogue,
         'full_conversation': full_conversation,
         'has_full_log': len(full_conversation) > 0
@@ -108,29 +229,40 @@ except ImportError:
     ai_agents_available = False
     print("⚠️  Original AI agents not available")
 
+def _basic_view() -> Dict:
+    """Create basic structure when the AI patient view is unavailable"""
+    return {
+        'success': True,
+        'alert': {'show_alert': False, 'severity': 'low'},
+        'admission': {'needs_admission': False},
+        'cost': {'total_estimated': 5000},
+        'options': {'recommended_action': 'Follow up with your doctor'}
+    }
+
 async def generate_enhanced_patient_view(analysis_data: Dict) -> Dict:
     """
     Generate comprehensive patient view with test results explanation
     """
     try:
-        # Get the original AI patient view if available
-        if ai_agents_available:
-            base_view = await original_ai_view(analysis_data)
-        else:
-            # Create basic structure
-            base_view = {
-                'success': True,
-                'alert': {'show_alert': False, 'severity': 'low'},
-                'admission': {'needs_admission': False},
-                'cost': {'total_estimated': 5000},
-                'options': {'recommended_action': 'Follow up with your doctor'}
-            }
-        
-        # Generate the comprehensive test explanation
-        test_explanation = await generate_patient_explanation(analysis_data)
+        # The base view is plain dict building - only the explainer awaits.
+        # A single failing agent should not take down the whole view
+        try:
+            base_view = original_ai_view(analysis_data) if ai_agents_available else _basic_view()
+        except Exception:
+            _log.warning("⚠️  AI patient view failed, using basic view", exc_info=True)
+            base_view = _basic_view()
+        try:
+            test_explanation = await _cached_patient_explanation(analysis_data)
+        except Exception:
+            _log.warning("⚠️  Test results explainer failed", exc_info=True)
+            test_explanation = {}
         
-        # Generate debate visualization inline
-        debate_summary = await visualize_agent_debate(analysis_data)
+        # Debate visualization is pure data munging - no need for a coroutine
+        try:
+            debate_summary = visualize_agent_debate(analysis_data)
+        except Exception:
+            _log.warning("⚠️  Debate visualization failed", exc_info=True)
+            debate_summary = {'show_debate_tab': False}
         
         # Enhance the base view with detailed explanations
         enhanced_view = {
@@ -139,36 +271,8 @@ async def generate_enhanced_patient_view(analysis_data: Dict) -> Dict:
                 'greeting': test_explanation.get('greeting', ''),
                 'executive_summary': test_explanation.get('summary', ''),
                 'sections': {
-                    'lab_results': {
-                        'title': '🔬 Your Blood Test Results',
-                        'content': test_explanation.get('lab_explanation', ''),
-                        'icon': 'flask'
-                    },
-                    'imaging': {
-                        'title': '🩻 Your X-Ray Results', 
-                        'content': test_explanation.get('imaging_explanation', ''),
-                        'icon': 'x-ray'
-                    },
-                    'risk_assessment': {
-                        'title': '📊 Your Risk Assessment',
-                        'content': test_explanation.get('risk_explanation', ''),
-                        'icon': 'chart-line'
-                    },
-                    'diagnosis': {
-                        'title': '🏥 Your Diagnosis',
-                        'content': test_explanation.get('diagnosis_explanation', ''),
-                        'icon': 'stethoscope'
-                    },
-                    'treatment': {
-                        'title': '💊 Your Treatment Plan',
-                        'content': test_explanation.get('treatment_rationale', ''),
-                        'icon': 'pills'
-                    },
-                    'timeline': {
-                        'title': '📅 What to Expect',
-                        'content': test_explanation.get('what_to_expect', ''),
-                        'icon': 'calendar'
-                    }
+                    key: {'title': title, 'content': test_explanation.get(field, ''), 'icon': icon}
+                    for key, title, field, icon in _SECTION_SPEC
                 },
                 'medical_team_note': test_explanation.get('consensus_note', ''),
                 'reassurance': test_explanation.get('reassurance', ''),
@@ -201,35 +305,12 @@ async def generate_enhanced_patient_view(analysis_data: Dict) -> Dict:
         return enhanced_view
         
     except Exception as e:
-        print(f"❌ Error in enhanced patient view: {e}")
-        import traceback
-        traceback.print_exc()
+        _log.exception("❌ Error in enhanced patient view")
         
         # Return minimal safe response
-        return {
-            'success': True,
-            'alert': {
-                'show_alert': False,
-                'severity': 'low',
-                'message': 'Please consult with your healthcare provider'
-            },
-            'admission': {
-                'needs_admission': False,
-                'reason': 'To be determined by your doctor'
-            },
-            'cost': {
-                'total_estimated': 0,
-                'message': 'Cost information unavailable'
-            },
-            'options': {
-                'recommended_action': 'Please see your healthcare provider for a complete evaluation'
-            },
-            'test_results_explanation': {
-                'greeting': 'Hello! Your test results are being processed.',
-                'executive_summary': 'Please speak with your healthcare provider for a detailed explanation of your results.'
-            },
-            'error': str(e)
-        }
+        response = copy.deepcopy(_SAFE_FALLBACK)
+        response['error'] = str(e)
+        return response
 
 # For backward compatibility
 async def generate_ai_patient_view(analysis_data: Dict) -> Dict:
@@ -1,149 +1,223 @@
 """
 Fixed AI Patient View - Generates comprehensive patient-friendly explanations
 """
-from typing import Dict
-import asyncio
+from typing import Dict, List
+from dataclasses import dataclass
+from utils.cost_calculator import calculate_hospital_cost, estimate_length_of_stay
+from agents.patient_view_types import AlertData, AdmissionData, CostData, OptionsData
 
-async def generate_ai_patient_view(analysis_results: Dict) -> Dict:
+# Static patient guidance - built once, copied only when a view needs to add to it
+_WHAT_TO_EXPECT = (
+    "Regular vital sign checks every 4-6 hours",
+    "IV medications to treat your condition",
+    "Blood tests to monitor your progress",
+    "Imaging studies if needed"
+)
+
+_DAILY_PLAN = {
+    "Day 1": ("Admission and initial treatment", "Start IV antibiotics", "Continuous monitoring"),
+    "Day 2-3": ("Continue treatment", "Monitor response", "Adjust medications as needed"),
+    "Day 4+": ("Evaluate for discharge", "Transition to oral medications if improving")
+}
+
+_QUESTIONS_FOR_DOCTOR = (
+    "What are the specific treatments for {diagnosis}?",
+    "What are the expected outcomes and timeline?",
+    "Are there any alternative treatment options?",
+    "What are the potential side effects?",
+    "When can I return to normal activities?"
+)
+
+_RED_FLAGS = (
+    "Worsening shortness of breath",
+    "Chest pain or pressure",
+    "High fever over 103°F",
+    "Confusion or altered mental state",
+    "Severe weakness or dizziness"
+)
+
+# Share of the flat estimate that goes to each line of the cost breakdown
+_COST_RATIOS = (
+    ("Room and nursing care", 0.4),
+    ("Medications", 0.2),
+    ("Laboratory tests", 0.15),
+    ("Imaging studies", 0.15),
+    ("Physician services", 0.1)
+)
+
+@dataclass(slots=True)
+class PatientContext:
+    """Fields the patient views need, pulled out of the analysis results once"""
+    consensus: Dict
+    patient: Dict
+    vitals: Dict
+    findings: Dict
+    diagnosis: str
+    disposition: str
+    confidence: str
+    key_interventions: List[str]
+    age: int
+    spo2: float
+    is_icu: bool
+    is_admission: bool
+    is_critical: bool
+    is_sepsis: bool
+    is_pneumonia: bool
+
+def extract_patient_context(analysis_results: Dict) -> PatientContext:
     """
-    Generate comprehensive patient view with all features
+    Destructure analysis results in a single pass
     """
-    # Extract data
     consensus = analysis_results.get('consensus', {})
-    patient_data = analysis_results.get('patient_data') or analysis_results.get('patient', {})
-    detailed_findings = analysis_results.get('detailed_findings', {})
-    
-    # Get key information
-    diagnosis = consensus.get('primary_diagnosis', 'Unknown condition')
+    patient = analysis_results.get('patient_data') or analysis_results.get('patient', {})
+    vitals = patient.get('vitals', {})
     disposition = consensus.get('disposition', 'Follow up with your doctor')
     confidence = consensus.get('confidence_level', 'MODERATE')
-    key_interventions = consensus.get('key_interventions', [])
-    
-    # Get patient vitals
-    vitals = patient_data.get('vitals', {})
-    age = patient_data.get('age', 0)
+    spo2 = vitals.get('oxygen_saturation', 100)
+    diagnosis = consensus.get('primary_diagnosis', 'Unknown condition')
+    diagnosis_lower = diagnosis.lower()
     
     # Determine severity based on multiple factors
     is_icu = 'ICU' in disposition
-    is_admission = 'Admit' in disposition
-    is_critical = is_icu or confidence == 'CRITICAL' or vitals.get('oxygen_saturation', 100) < 90
+    
+    return PatientContext(
+        consensus=consensus,
+        patient=patient,
+        vitals=vitals,
+        findings=analysis_results.get('detailed_findings', {}),
+        diagnosis=diagnosis,
+        disposition=disposition,
+        confidence=confidence,
+        key_interventions=consensus.get('key_interventions', []),
+        age=patient.get('age', 0),
+        spo2=spo2,
+        is_icu=is_icu,
+        is_admission='Admit' in disposition,
+        is_critical=is_icu or confidence == 'CRITICAL' or spo2 < 90,
+        is_sepsis='sepsis' in diagnosis_lower,
+        is_pneumonia='pneumonia' in diagnosis_lower
+    )
+
+def generate_ai_patient_view(analysis_results: Dict, *, use_analytics: bool = False) -> Dict:
+    """
+    Generate comprehensive patient view with all features
+    
+    With use_analytics the cost estimate comes from the unified cost
+    calculator, otherwise from the flat per-disposition estimate.
+    Pure dict building with no I/O, so this is a plain function - callers
+    that need to offload it can use asyncio.to_thread.
+    """
+    # Extract data
+    ctx = extract_patient_context(analysis_results)
+    diagnosis = ctx.diagnosis
+    disposition = ctx.disposition
+    confidence = ctx.confidence
+    key_interventions = ctx.key_interventions
+    is_icu = ctx.is_icu
+    is_admission = ctx.is_admission
+    is_critical = ctx.is_critical
     
     # Generate emergency alert
-    alert_data = {
-        "show_alert": is_critical or is_icu,
-        "severity": "critical" if is_critical else "high" if is_admission else "moderate",
-        "title": f"{'URGENT: ' if is_critical else ''}Medical Attention Required",
-        "message": f"You have been diagnosed with {diagnosis}. {'Immediate hospital care is needed.' if is_critical else 'Please follow the recommended treatment plan.'}",
-        "urgency_reasons": []
-    }
+    alert = AlertData(
+        show_alert=is_critical or is_icu,
+        severity="critical" if is_critical else "high" if is_admission else "moderate",
+        title=f"{'URGENT: ' if is_critical else ''}Medical Attention Required",
+        message=f"You have been diagnosed with {diagnosis}. {'Immediate hospital care is needed.' if is_critical else 'Please follow the recommended treatment plan.'}"
+    )
     
     # Add urgency reasons
     if is_critical:
-        if vitals.get('oxygen_saturation', 100) < 90:
-            alert_data['urgency_reasons'].append(f"⚠️ Low oxygen level: {vitals.get('oxygen_saturation')}%")
-        if 'sepsis' in diagnosis.lower():
-            alert_data['urgency_reasons'].append("⚠️ Signs of severe infection (sepsis)")
+        if ctx.spo2 < 90:
+            alert.urgency_reasons.append(f"⚠️ Low oxygen level: {ctx.spo2}%")
+        if ctx.is_sepsis:
+            alert.urgency_reasons.append("⚠️ Signs of severe infection (sepsis)")
         if is_icu:
-            alert_data['urgency_reasons'].append("⚠️ Condition requires intensive care monitoring")
+            alert.urgency_reasons.append("⚠️ Condition requires intensive care monitoring")
     
     # Add diagnosis-specific reasons
-    alert_data['urgency_reasons'].append(f"Diagnosis: {diagnosis}")
-    alert_data['urgency_reasons'].extend(key_interventions[:2])
+    alert.urgency_reasons.append(f"Diagnosis: {diagnosis}")
+    alert.urgency_reasons.extend(key_interventions[:2])
     
     # Generate admission information
-    admission_data = {
-        "needs_admission": is_admission or is_icu,
-        "admission_type": "ICU" if is_icu else "Hospital Ward" if is_admission else "Outpatient",
-        "expected_stay": "5-7 days" if is_icu else "3-5 days" if is_admission else "No admission needed",
-        "reasons": [],
-        "what_to_expect": [],
-        "daily_plan": {}
-    }
+    admission = AdmissionData(
+        needs_admission=is_admission or is_icu,
+        admission_type="ICU" if is_icu else "Hospital Ward" if is_admission else "Outpatient",
+        expected_stay="5-7 days" if is_icu else "3-5 days" if is_admission else "No admission needed"
+    )
     
     if is_admission or is_icu:
         # Add admission reasons
-        admission_data['reasons'] = [
+        admission.reasons = [
             f"Your condition ({diagnosis}) requires hospital care",
             "You need IV medications and close monitoring",
             "Your vital signs need continuous observation"
         ]
         
         # What to expect
-        admission_data['what_to_expect'] = [
-            "Regular vital sign checks every 4-6 hours",
-            "IV medications to treat your condition",
-            "Blood tests to monitor your progress",
-            "Imaging studies if needed"
-        ]
+        admission.what_to_expect = _WHAT_TO_EXPECT
         
         # Daily plan
-        admission_data['daily_plan'] = {
-            "Day 1": ["Admission and initial treatment", "Start IV antibiotics", "Continuous monitoring"],
-            "Day 2-3": ["Continue treatment", "Monitor response", "Adjust medications as needed"],
-            "Day 4+": ["Evaluate for discharge", "Transition to oral medications if improving"]
-        }
+        admission.daily_plan = dict(_DAILY_PLAN)
     
     # Generate cost estimates
-    base_cost = 20000 if is_icu else 12000 if is_admission else 2500
-    cost_data = {
-        "total_estimated": base_cost,
-        "breakdown": {
-            "Room and nursing care": base_cost * 0.4,
-            "Medications": base_cost * 0.2,
-            "Laboratory tests": base_cost * 0.15,
-            "Imaging studies": base_cost * 0.15,
-            "Physician services": base_cost * 0.1
-        },
-        "insurance_estimate": {
-            "with_insurance": base_cost * 0.2,  # Assuming 80% coverage
-            "deductible_info": "Subject to your plan's deductible",
-            "coverage_note": "Most insurance plans cover 70-80% after deductible"
-        },
-        "financial_options": [
-            "Payment plans available",
-            "Financial assistance programs may apply",
-            "Discuss with billing department"
-        ]
-    }
+    if use_analytics:
+        risk_level = ctx.findings.get('risk', {}).get('overall_risk') or (
+            "CRITICAL" if is_icu else "MODERATE" if is_admission else "LOW"
+        )
+        los = estimate_length_of_stay(risk_level, diagnosis)
+        analytics = calculate_hospital_cost(risk_level, diagnosis, ctx.age, los)
+        cost = CostData(
+            total_estimated=analytics["total_estimated"],
+            breakdown=analytics["breakdown"],
+            insurance_estimate={
+                **analytics["insurance_estimate"],
+                "deductible_info": "Subject to your plan's deductible"
+            }
+        )
+    else:
+        base_cost = 20000 if is_icu else 12000 if is_admission else 2500
+        cost = CostData(
+            total_estimated=base_cost,
+            breakdown={item: base_cost * ratio for item, ratio in _COST_RATIOS},
+            insurance_estimate={
+                "with_insurance": base_cost * 0.2,  # Assuming 80% coverage
+                "deductible_info": "Subject to your plan's deductible",
+                "coverage_note": "Most insurance plans cover 70-80% after deductible"
+            }
+        )
+    cost.financial_options = [
+        "Payment plans available",
+        "Financial assistance programs may apply",
+        "Discuss with billing department"
+    ]
     
     # Generate treatment options
-    options_data = {
-        "recommended_action": disposition,
-        "treatment_approach": f"Standard care protocol for {diagnosis}",
-        "alternatives": [],
-        "questions_for_doctor": [
-            f"What are the specific treatments for {diagnosis}?",
-            "What are the expected outcomes and timeline?",
-            "Are there any alternative treatment options?",
-            "What are the potential side effects?",
-            "When can I return to normal activities?"
-        ],
-        "red_flags": [
-            "Worsening shortness of breath",
-            "Chest pain or pressure",
-            "High fever over 103°F",
-            "Confusion or altered mental state",
-            "Severe weakness or dizziness"
-        ]
-    }
+    options = OptionsData(
+        recommended_action=disposition,
+        treatment_approach=f"Standard care protocol for {diagnosis}",
+        questions_for_doctor=[_QUESTIONS_FOR_DOCTOR[0].format(diagnosis=diagnosis), *_QUESTIONS_FOR_DOCTOR[1:]],
+        red_flags=_RED_FLAGS
+    )
     
     # Add specific red flags based on diagnosis
-    if 'pneumonia' in diagnosis.lower():
-        options_data['red_flags'].insert(0, "Coughing up blood")
-    if 'sepsis' in diagnosis.lower():
-        options_data['red_flags'].insert(0, "Rapid heart rate with low blood pressure")
+    if ctx.is_pneumonia or ctx.is_sepsis:
+        options.red_flags = list(_RED_FLAGS)
+        if ctx.is_pneumonia:
+            options.red_flags.insert(0, "Coughing up blood")
+        if ctx.is_sepsis:
+            options.red_flags.insert(0, "Rapid heart rate with low blood pressure")
     
-    # Compile final view
+    # Compile final view - sections become dicts only here, callers extend them
     return {
         "success": True,
-        "alert": alert_data,
-        "admission": admission_data,
-        "cost": cost_data,
-        "options": options_data,
+        "alert": alert.to_dict(),
+        "admission": admission.to_dict(),
+        "cost": cost.to_dict(),
+        "options": options.to_dict(),
         "summary": {
             "diagnosis": diagnosis,
             "severity": confidence,
-            "key_findings": detailed_findings.get('lab', {}).get('patterns', []),
+            "key_findings": ctx.findings.get('lab', {}).get('patterns', []),
             "next_steps": key_interventions[:3] if key_interventions else ["Follow treatment plan"]
         }
     }
@@ -3,32 +3,47 @@ Enhanced Patient View with Consistency - Shows both AI results and consistency c
 """
 from typing import Dict
 import asyncio
-from agents.fixed_ai_patient_view import generate_ai_patient_view as original_patient_view
+import heapq
+import functools
+from agents.fixed_ai_patient_view import generate_ai_patient_view as original_patient_view, extract_patient_context
 from utils.hybrid_analyzer import HybridMedicalAnalyzer
 
-# Initialize hybrid analyzer
-hybrid_analyzer = HybridMedicalAnalyzer()
+# Hybrid analyzer is created on first use - constructing it loads the analysis cache
+@functools.cache
+def _analyzer() -> HybridMedicalAnalyzer:
+    return HybridMedicalAnalyzer()
 
 async def generate_ai_patient_view(clinical_data: Dict) -> Dict:
     """
     Generate patient view with CONSISTENCY checking
     """
-    # First get the original AI patient view
-    original_view = await original_patient_view(clinical_data)
-    
     # Extract necessary data for hybrid analysis
-    patient_data = clinical_data.get('patient_data') or clinical_data.get('patient', {})
-    lab_data = clinical_data.get('detailed_findings', {}).get('lab', {}).get('key_values', {})
-    xray_data = clinical_data.get('detailed_findings', {}).get('imaging', {}).get('key_findings', [])
+    ctx = extract_patient_context(clinical_data)
+    patient_data = ctx.patient
+    lab_data = ctx.findings.get('lab', {}).get('key_values', {})
+    xray_data = ctx.findings.get('imaging', {}).get('key_findings', [])
     
-    # Run hybrid consistency check
-    try:
-        hybrid_result = hybrid_analyzer.analyze_with_consistency(
+    # The AI patient view and the consistency check (rules plus a cache file
+    # write, serialized by the analyzer lock) only read clinical_data - run both
+    # off the event loop together
+    original_view, hybrid_result = await asyncio.gather(
+        asyncio.to_thread(original_patient_view, clinical_data),
+        asyncio.to_thread(
+            _analyzer().analyze_with_consistency,
             patient_data,
             clinical_data,
             lab_data,
             xray_data
-        )
+        ),
+        return_exceptions=True
+    )
+    if isinstance(original_view, Exception):
+        raise original_view
+    
+    # Apply hybrid consistency check
+    try:
+        if isinstance(hybrid_result, Exception):
+            raise hybrid_result
         
         # Add consistency information to the view
         if hybrid_result.get('override_applied'):
@@ -48,11 +63,12 @@ async def generate_ai_patient_view(clinical_data: Dict) -> Dict:
             }
         
         # Add analysis metadata
+        indicators = hybrid_result['confidence_indicators']
         original_view['analysis_metadata'] = {
-            'ai_confidence': hybrid_result['confidence_indicators']['ai_confidence'],
-            'agent_agreement': hybrid_result['confidence_indicators']['agent_agreement'],
-            'data_completeness': hybrid_result['confidence_indicators']['data_completeness'],
-            'consistency_applied': hybrid_result['confidence_indicators']['consistency_applied'],
+            'ai_confidence': indicators['ai_confidence'],
+            'agent_agreement': indicators['agent_agreement'],
+            'data_completeness': indicators['data_completeness'],
+            'consistency_applied': indicators['consistency_applied'],
             'analysis_id': hybrid_result.get('consistency_hash', 'N/A')
         }
         
@@ -76,20 +92,18 @@ async def get_analysis_history(patient_id: str) -> Dict:
     """
     Get history of analyses for a patient showing consistency
     """
-    cache = hybrid_analyzer._load_cache()
-    patient_analyses = []
-    
-    for key, value in cache.items():
-        if patient_id in key:
-            patient_analyses.append({
-                'timestamp': value['timestamp'],
-                'diagnosis': value['analysis']['diagnosis'],
-                'risk': value['analysis']['risk_level'],
-                'consistency_hash': key[:8]
-            })
+    patient_analyses = [
+        {
+            'timestamp': value['timestamp'],
+            'diagnosis': value['analysis']['diagnosis'],
+            'risk': value['analysis']['risk_level'],
+            'consistency_hash': key[:8]
+        }
+        for key, value in _analyzer().get_patient_analyses(patient_id)
+    ]
     
     return {
         'patient_id': patient_id,
         'total_analyses': len(patient_analyses),
-        'analyses': sorted(patient_analyses, key=lambda x: x['timestamp'], reverse=True)[:5]
+        'analyses': heapq.nlargest(5, patient_analyses, key=lambda x: x['timestamp'])
     }
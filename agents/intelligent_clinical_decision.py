@@ -1,8 +1,10 @@
 """
 Intelligent Clinical Decision Agent that makes evidence-based treatment decisions
 """
+import re
 import asyncio
 from typing import Dict, List, Any, Optional
+from dataclasses import dataclass
 from datetime import datetime
 
 import sys
@@ -10,11 +12,241 @@ sys.path.append('..')
 from core.blackboard import blackboard, MessageType, Priority
 from utils.medical_intelligence import MedicalIntelligence, RiskLevel
 
+# Chief complaint keyword groups. Matched as substrings ('breath' must still
+# catch 'breathless', 'lie flat' is two words), so these are scanned, not tokenized
+_ORTHOPNEA_MARKERS = frozenset({'pillows', 'lie flat', 'orthopnea', 'breathing'})
+_DYSPNEA_MARKERS = frozenset({'breath', 'dyspnea', 'shortness'})
+
+# Imaging terms the diagnosis looks for - one pass over the findings finds them all
+_IMAGING_TERMS_RE = re.compile(r'pneumonia|infiltrat|consolidation|cardiomegaly')
+
+# Diagnoses that need admission even without a critical risk level
+_SERIOUS_DX = frozenset({'pneumonia', 'heart failure', 'sepsis', 'copd exacerbation'})
+
+def _mentions(text: str, markers) -> bool:
+    """True if any marker appears in text"""
+    return any(marker in text for marker in markers)
+
+@dataclass(slots=True)
+class DiagnosisFeatures:
+    """Findings the diagnosis rules look at, computed once per patient"""
+    pneumonia: bool
+    severe_bacterial: bool
+    chronic_cough: bool
+    high_crp: bool
+    inflammatory: bool
+    sepsis_alert: bool
+    heart_failure_labs: bool
+    orthopnea: bool
+    cardiomegaly: bool
+    respiratory_symptoms: bool
+    bacterial_labs: bool
+    productive: bool
+    dyspnea: bool
+    hypoxemic: bool
+    chronic: bool
+    smoker: bool
+    crp: float
+
+def _diagnosis_features(evidence: Dict) -> DiagnosisFeatures:
+    """
+    Extract everything the diagnosis rules need from the gathered evidence
+    """
+    # Get patient info
+    patient_data = evidence['patient_data']
+    chief_complaint = patient_data.get('chief_complaint', '').lower()
+    has_cough = 'cough' in chief_complaint
+    is_chronic = 'chronic' in chief_complaint
+    
+    # Get oxygen saturation from vitals
+    o2_sat = patient_data.get('vitals', {}).get('oxygen_saturation', 100)
+    
+    # Get lab patterns
+    lab_analysis = evidence['lab_analysis']
+    lab_patterns = lab_analysis.get('patterns', [])
+    crp = evidence['crp']
+    severe_bacterial = 'SEVERE_BACTERIAL_INFECTION' in lab_patterns
+    
+    # Get imaging findings - scanned once for every term the rules care about
+    imaging_impression = evidence['imaging'].get('impression', '').lower()
+    imaging_terms = set(_IMAGING_TERMS_RE.findall(' '.join(evidence['imaging_findings_lower'])))
+    
+    # Check for pneumonia - MULTIPLE ways to detect
+    pneumonia_indicators = 0
+    if 'pneumonia' in imaging_impression:
+        pneumonia_indicators += 2
+    if 'pneumonia' in imaging_terms:
+        pneumonia_indicators += 2
+    if 'infiltrat' in imaging_terms:
+        pneumonia_indicators += 1
+    if 'consolidation' in imaging_terms:
+        pneumonia_indicators += 1
+    if severe_bacterial and (has_cough or 'fever' in chief_complaint):
+        pneumonia_indicators += 2
+    
+    return DiagnosisFeatures(
+        pneumonia=pneumonia_indicators >= 2,
+        severe_bacterial=severe_bacterial,
+        chronic_cough=is_chronic and has_cough,
+        high_crp=bool(crp) and crp > 100,
+        inflammatory='INFLAMMATORY_PROCESS' in lab_patterns,
+        sepsis_alert=any('sepsis' in topic.lower() for topic, _ in evidence['critical_alerts']),
+        heart_failure_labs='HEART_FAILURE' in lab_patterns,
+        orthopnea=_mentions(chief_complaint, _ORTHOPNEA_MARKERS),
+        cardiomegaly='cardiomegaly' in imaging_terms,
+        respiratory_symptoms=has_cough or 'breathing' in chief_complaint,
+        bacterial_labs='BACTERIAL_INFECTION' in lab_patterns or (bool(crp) and crp > 50),
+        productive='productive' in chief_complaint,
+        dyspnea=_mentions(chief_complaint, _DYSPNEA_MARKERS),
+        hypoxemic=o2_sat < 94,
+        chronic=is_chronic,
+        smoker=patient_data.get('medical_history', {}).get('smoking') in ['Current', 'Former'],
+        crp=crp
+    )
+
+_PNEUMONIA_DIFFERENTIAL = ("Viral pneumonia", "Atypical pneumonia", "Aspiration pneumonia")
+_HYPOXEMIA_DIFFERENTIAL = ("Pulmonary embolism", "Pneumonia", "Heart failure", "Interstitial lung disease")
+
+# Diagnosis rules in priority order - the first matching rule wins.
+# Supporting evidence may reference {crp}
+_DIAGNOSIS_RULES = (
+    # Pneumonia
+    (lambda f: f.pneumonia and f.severe_bacterial, {
+        'primary': "Bacterial pneumonia with severe sepsis",
+        'confidence': 0.9,
+        'supporting_evidence': ("Pneumonia on imaging", "Elevated inflammatory markers", "SIRS criteria met"),
+        'differential': _PNEUMONIA_DIFFERENTIAL
+    }),
+    (lambda f: f.pneumonia, {
+        'primary': "Community-acquired pneumonia",
+        'confidence': 0.8,
+        'supporting_evidence': ("Pneumonia on imaging", "Clinical presentation consistent"),
+        'differential': _PNEUMONIA_DIFFERENTIAL
+    }),
+    # Chronic cough with high CRP
+    (lambda f: f.chronic_cough and f.high_crp, {
+        'primary': "Chronic bronchitis with acute exacerbation",
+        'confidence': 0.7,
+        'supporting_evidence': ("Chronic cough history", "Markedly elevated CRP ({crp})", "Normal chest X-ray"),
+        'differential': ("Occult pneumonia", "Tuberculosis", "Malignancy", "Autoimmune process")
+    }),
+    (lambda f: f.chronic_cough and f.inflammatory, {
+        'primary': "Inflammatory respiratory condition",
+        'confidence': 0.6,
+        'supporting_evidence': ("Chronic symptoms", "Elevated inflammatory markers", "Requires further investigation"),
+        'differential': ("Chronic bronchitis", "Asthma", "Interstitial lung disease", "Post-infectious cough")
+    }),
+    (lambda f: f.chronic_cough, {
+        'primary': "Chronic cough syndrome",
+        'confidence': 0.5,
+        'supporting_evidence': ("Persistent symptoms", "No acute findings")
+    }),
+    # Sepsis
+    (lambda f: f.sepsis_alert, {
+        'primary': "Sepsis of unknown origin",
+        'confidence': 0.85,
+        'supporting_evidence': ("SIRS criteria positive", "Organ dysfunction present", "Elevated lactate"),
+        'differential': ("Urosepsis", "Pneumonia", "Intra-abdominal infection")
+    }),
+    # Heart failure by labs, then by symptoms and imaging
+    (lambda f: f.heart_failure_labs, {
+        'primary': "Acute decompensated heart failure",
+        'confidence': 0.85,
+        'supporting_evidence': ("Elevated BNP", "Cardiomegaly on imaging", "Clinical presentation"),
+        'differential': ("Pulmonary embolism", "Pneumonia", "COPD exacerbation")
+    }),
+    (lambda f: f.orthopnea and f.cardiomegaly, {
+        'primary': "Congestive heart failure with acute exacerbation",
+        'confidence': 0.75,
+        'supporting_evidence': ("Orthopnea (needs pillows to sleep)", "Cardiomegaly on imaging", "Elevated BP"),
+        'differential': ("Pulmonary edema", "COPD", "Sleep apnea")
+    }),
+    # Respiratory infection without clear pneumonia
+    (lambda f: f.respiratory_symptoms and f.bacterial_labs and f.productive, {
+        'primary': "Acute bronchitis",
+        'confidence': 0.7,
+        'supporting_evidence': ("Respiratory symptoms", "Elevated CRP ({crp})", "Bacterial pattern on labs")
+    }),
+    (lambda f: f.respiratory_symptoms and f.bacterial_labs, {
+        'primary': "Lower respiratory tract infection",
+        'confidence': 0.7,
+        'supporting_evidence': ("Respiratory symptoms", "Elevated CRP ({crp})", "Bacterial pattern on labs")
+    }),
+    # COPD/respiratory disease without infection
+    (lambda f: f.dyspnea and f.hypoxemic and f.chronic and f.smoker, {
+        'primary': "COPD exacerbation",
+        'confidence': 0.75,
+        'supporting_evidence': ("Chronic dyspnea with acute worsening", "Hypoxemia (O2 < 94%)", "Smoking history"),
+        'differential': _HYPOXEMIA_DIFFERENTIAL
+    }),
+    (lambda f: f.dyspnea and f.hypoxemic and f.chronic, {
+        'primary': "Chronic respiratory failure",
+        'confidence': 0.65,
+        'supporting_evidence': ("Chronic progressive dyspnea", "Hypoxemia", "No clear cardiac etiology"),
+        'differential': _HYPOXEMIA_DIFFERENTIAL
+    }),
+    (lambda f: f.dyspnea and f.hypoxemic, {
+        'primary': "Acute hypoxemic respiratory failure",
+        'confidence': 0.7,
+        'supporting_evidence': ("Acute dyspnea", "Hypoxemia", "Requires further evaluation"),
+        'differential': _HYPOXEMIA_DIFFERENTIAL
+    })
+)
+
+_UNDIFFERENTIATED = {
+    'primary': 'Undifferentiated illness',
+    'confidence': 0.5
+}
+
+def _intern_diagnosis_names(templates) -> Dict[str, str]:
+    """Share one interned copy of each diagnosis name, returning name -> lowercase name"""
+    lower_names = {}
+    for template in templates:
+        template['primary'] = sys.intern(template['primary'])
+        lower_names[template['primary']] = sys.intern(template['primary'].lower())
+    return lower_names
+
+# Treatment planning matches on the lowercase name - computed here once, not per patient
+_DIAGNOSIS_LOWER = _intern_diagnosis_names([template for _, template in _DIAGNOSIS_RULES] + [_UNDIFFERENTIATED])
+
+def _render_diagnosis(template: Dict, features: DiagnosisFeatures) -> Dict:
+    """Fresh diagnosis dict from a rule template"""
+    return {
+        'primary': template['primary'],
+        'differential': list(template.get('differential', ())),
+        'confidence': template['confidence'],
+        'supporting_evidence': [
+            evidence.format(crp=features.crp) for evidence in template.get('supporting_evidence', ())
+        ]
+    }
+
+# Canned answers to treatment questions from other agents
+_KIDNEY_DOSING_RESPONSE = "\n".join([
+    "Absolutely correct. With kidney dysfunction, we must adjust doses:",
+    "- Reduce beta-lactam antibiotics by 50%",
+    "- Avoid NSAIDs completely",
+    "- Monitor drug levels for vancomycin if used"
+])
+
+_ADDITIONAL_TESTS_RESPONSE = "\n".join([
+    "For pneumonia differential:",
+    "- Respiratory viral panel",
+    "- Legionella and pneumococcal antigens",
+    "- Procalcitonin to guide antibiotic duration",
+    "- Consider bronchoscopy if not improving"
+])
+
 class IntelligentClinicalDecisionAgent:
     """
     Clinical decision maker that synthesizes all findings and debates treatment
     """
     
+    __slots__ = (
+        'agent_id', 'name', 'medical_intel', 'patient_data',
+        '_post', '_post_many', '_ask_question', '_respond_to_question', '_latest_finding',
+        '_MT_FINDING', '_MT_ALERT', '_P_HIGH', '_P_CRITICAL'
+    )
+    
     def __init__(self):
         self.agent_id = "ClinicalDecision"
         self.name = "Dr. DecisionMaker"
@@ -31,6 +263,18 @@ class IntelligentClinicalDecisionAgent:
         self.medical_intel = MedicalIntelligence()
         self.patient_data = {}
         
+        # Blackboard methods and enum members used on every case - bound once
+        # (enum member access goes through a descriptor each time)
+        self._post = blackboard.post
+        self._post_many = blackboard.post_many
+        self._ask_question = blackboard.ask_question
+        self._respond_to_question = blackboard.respond_to_question
+        self._latest_finding = blackboard.get_latest_finding
+        self._MT_FINDING = MessageType.FINDING
+        self._MT_ALERT = MessageType.ALERT
+        self._P_HIGH = Priority.HIGH
+        self._P_CRITICAL = Priority.CRITICAL
+        
     async def analyze(self) -> Dict[str, Any]:
         """
         Make clinical decisions based on all available evidence
@@ -46,14 +290,18 @@ class IntelligentClinicalDecisionAgent:
         # Create treatment plan
         treatment_plan = await self._create_treatment_plan(diagnosis, evidence)
         
-        # Check for disagreements
+        # First-line medication, quoted in both the opinion and the final question
+        first_med = treatment_plan['medications'][0] if treatment_plan['medications'] else 'supportive care'
+        
+        # Check for disagreements - before our own opinions are posted, so the
+        # check only sees what the other agents think
         await self._check_agent_consensus(diagnosis, treatment_plan)
         
         # Communicate decisions
-        await self._communicate_decisions(diagnosis, treatment_plan)
+        await self._communicate_decisions(diagnosis, treatment_plan, first_med)
         
         # Ask for final confirmation
-        await self._seek_final_consensus(treatment_plan)
+        await self._seek_final_consensus(treatment_plan, first_med)
         
         return {
             'diagnosis': diagnosis,
@@ -67,13 +315,23 @@ class IntelligentClinicalDecisionAgent:
         Gather all findings from other agents
         """
         evidence = {
-            'patient_data': blackboard.get_latest_finding('patient_data') or {},
-            'lab_analysis': blackboard.get_latest_finding('lab_analysis_complete') or {},
-            'imaging': blackboard.get_latest_finding('xray_analysis_complete') or {},
-            'risk_assessment': blackboard.get_latest_finding('risk_assessment_complete') or {},
-            'critical_alerts': blackboard.active_alerts,
+            'patient_data': self._latest_finding('patient_data') or {},
+            'lab_analysis': self._latest_finding('lab_analysis_complete') or {},
+            'imaging': self._latest_finding('xray_analysis_complete') or {},
+            'risk_assessment': self._latest_finding('risk_assessment_complete') or {},
+            'kidney_dysfunction': self._latest_finding('kidney_dysfunction') or {},
+            # Snapshot of just the alert fields decisions use, safe from later posts
+            'critical_alerts': tuple(
+                (str(alert.get('topic', '')), alert.get('priority')) for alert in blackboard.active_alerts
+            ),
             'consensus_topics': blackboard.consensus_topics
         }
+        # Diagnosis and treatment both key off CRP - extract it once
+        evidence['crp'] = evidence['lab_analysis'].get('key_values', {}).get('crp', 0)
+        # Lowercased imaging findings, stringified once for every keyword scan
+        evidence['imaging_findings_lower'] = [
+            str(finding).lower() for finding in evidence['imaging'].get('key_findings', [])
+        ]
         
         # Print summary of evidence
         print(f"[{self.name}] Evidence gathered:")
@@ -88,205 +346,11 @@ class IntelligentClinicalDecisionAgent:
         """
         Determine primary and differential diagnoses
         """
-        diagnosis = {
-            'primary': 'Undifferentiated illness',
-            'differential': [],
-            'confidence': 0.5,
-            'supporting_evidence': []
-        }
-        
-        # Get patient info
-        patient_data = evidence['patient_data']
-        chief_complaint = patient_data.get('chief_complaint', '').lower()
-        age = patient_data.get('age', 0)
-        
-        # Get oxygen saturation from vitals
-        vitals = patient_data.get('vitals', {})
-        o2_sat = vitals.get('oxygen_saturation', 100)
-        
-        # Get lab patterns
-        lab_patterns = evidence['lab_analysis'].get('patterns', [])
-        lab_values = evidence['lab_analysis'].get('key_values', {})
-        crp = lab_values.get('crp', 0)
-        wbc = lab_values.get('wbc', 0)
-        
-        # Get imaging findings
-        imaging_impression = evidence['imaging'].get('impression', '').lower()
-        imaging_findings = evidence['imaging'].get('key_findings', [])
-        
-        # Check for pneumonia - MULTIPLE ways to detect
-        pneumonia_indicators = 0
-        if 'pneumonia' in imaging_impression:
-            pneumonia_indicators += 2
-        if any('pneumonia' in str(finding).lower() for finding in imaging_findings):
-            pneumonia_indicators += 2
-        if any('infiltrat' in str(finding).lower() for finding in imaging_findings):
-            pneumonia_indicators += 1
-        if any('consolidation' in str(finding).lower() for finding in imaging_findings):
-            pneumonia_indicators += 1
-        if 'SEVERE_BACTERIAL_INFECTION' in lab_patterns and ('cough' in chief_complaint or 'fever' in chief_complaint):
-            pneumonia_indicators += 2
-        
-        if pneumonia_indicators >= 2:
-            if 'SEVERE_BACTERIAL_INFECTION' in lab_patterns:
-                diagnosis['primary'] = "Bacterial pneumonia with severe sepsis"
-                diagnosis['confidence'] = 0.9
-                diagnosis['supporting_evidence'] = [
-                    "Pneumonia on imaging",
-                    "Elevated inflammatory markers",
-                    "SIRS criteria met"
-                ]
-            else:
-                diagnosis['primary'] = "Community-acquired pneumonia"
-                diagnosis['confidence'] = 0.8
-                diagnosis['supporting_evidence'] = [
-                    "Pneumonia on imaging",
-                    "Clinical presentation consistent"
-                ]
-            
-            diagnosis['differential'] = [
-                "Viral pneumonia",
-                "Atypical pneumonia",
-                "Aspiration pneumonia"
-            ]
-        
-        # Check for chronic cough with high CRP
-        elif 'chronic' in chief_complaint and 'cough' in chief_complaint:
-            if crp and crp > 100:
-                diagnosis['primary'] = "Chronic bronchitis with acute exacerbation"
-                diagnosis['confidence'] = 0.7
-                diagnosis['supporting_evidence'] = [
-                    "Chronic cough history",
-                    f"Markedly elevated CRP ({crp})",
-                    "Normal chest X-ray"
-                ]
-                diagnosis['differential'] = [
-                    "Occult pneumonia",
-                    "Tuberculosis",
-                    "Malignancy",
-                    "Autoimmune process"
-                ]
-            elif 'INFLAMMATORY_PROCESS' in lab_patterns:
-                diagnosis['primary'] = "Inflammatory respiratory condition"
-                diagnosis['confidence'] = 0.6
-                diagnosis['supporting_evidence'] = [
-                    "Chronic symptoms",
-                    "Elevated inflammatory markers",
-                    "Requires further investigation"
-                ]
-                diagnosis['differential'] = [
-                    "Chronic bronchitis",
-                    "Asthma",
-                    "Interstitial lung disease",
-                    "Post-infectious cough"
-                ]
-            else:
-                diagnosis['primary'] = "Chronic cough syndrome"
-                diagnosis['confidence'] = 0.5
-                diagnosis['supporting_evidence'] = [
-                    "Persistent symptoms",
-                    "No acute findings"
-                ]
-        
-        # Check for sepsis
-        elif any('sepsis' in str(alert.get('topic', '')).lower() for alert in evidence['critical_alerts']):
-            diagnosis['primary'] = "Sepsis of unknown origin"
-            diagnosis['confidence'] = 0.85
-            diagnosis['supporting_evidence'] = [
-                "SIRS criteria positive",
-                "Organ dysfunction present",
-                "Elevated lactate"
-            ]
-            diagnosis['differential'] = [
-                "Urosepsis",
-                "Pneumonia",
-                "Intra-abdominal infection"
-            ]
-        
-        # Check for heart failure
-        elif 'HEART_FAILURE' in lab_patterns:
-            diagnosis['primary'] = "Acute decompensated heart failure"
-            diagnosis['confidence'] = 0.85
-            diagnosis['supporting_evidence'] = [
-                "Elevated BNP",
-                "Cardiomegaly on imaging",
-                "Clinical presentation"
-            ]
-            diagnosis['differential'] = [
-                "Pulmonary embolism",
-                "Pneumonia",
-                "COPD exacerbation"
-            ]
-        
-        # Check for heart failure by symptoms and imaging
-        elif (('pillows' in chief_complaint or 'lie flat' in chief_complaint or 
-               'orthopnea' in chief_complaint or 'breathing' in chief_complaint) and
-              any('cardiomegaly' in str(finding).lower() for finding in imaging_findings)):
-            diagnosis['primary'] = "Congestive heart failure with acute exacerbation"
-            diagnosis['confidence'] = 0.75
-            diagnosis['supporting_evidence'] = [
-                "Orthopnea (needs pillows to sleep)",
-                "Cardiomegaly on imaging",
-                "Elevated BP"
-            ]
-            diagnosis['differential'] = [
-                "Pulmonary edema",
-                "COPD",
-                "Sleep apnea"
-            ]
-        
-        # Check for respiratory infection without clear pneumonia
-        elif ('cough' in chief_complaint or 'breathing' in chief_complaint) and \
-             ('BACTERIAL_INFECTION' in lab_patterns or crp > 50):
-            if 'productive' in chief_complaint:
-                diagnosis['primary'] = "Acute bronchitis"
-            else:
-                diagnosis['primary'] = "Lower respiratory tract infection"
-            diagnosis['confidence'] = 0.7
-            diagnosis['supporting_evidence'] = [
-                "Respiratory symptoms",
-                f"Elevated CRP ({crp})",
-                "Bacterial pattern on labs"
-            ]
-        
-        # Check for COPD/respiratory disease without infection
-        elif ('breath' in chief_complaint or 'dyspnea' in chief_complaint or 
-              'shortness' in chief_complaint) and o2_sat < 94:
-            # Check for chronic vs acute
-            if 'chronic' in chief_complaint:
-                if patient_data.get('medical_history', {}).get('smoking') in ['Current', 'Former']:
-                    diagnosis['primary'] = "COPD exacerbation"
-                    diagnosis['confidence'] = 0.75
-                    diagnosis['supporting_evidence'] = [
-                        "Chronic dyspnea with acute worsening",
-                        "Hypoxemia (O2 < 94%)",
-                        "Smoking history"
-                    ]
-                else:
-                    diagnosis['primary'] = "Chronic respiratory failure"
-                    diagnosis['confidence'] = 0.65
-                    diagnosis['supporting_evidence'] = [
-                        "Chronic progressive dyspnea",
-                        "Hypoxemia",
-                        "No clear cardiac etiology"
-                    ]
-            else:
-                diagnosis['primary'] = "Acute hypoxemic respiratory failure"
-                diagnosis['confidence'] = 0.7
-                diagnosis['supporting_evidence'] = [
-                    "Acute dyspnea",
-                    "Hypoxemia",
-                    "Requires further evaluation"
-                ]
-            
-            diagnosis['differential'] = [
-                "Pulmonary embolism",
-                "Pneumonia",
-                "Heart failure",
-                "Interstitial lung disease"
-            ]
-        
-        return diagnosis
+        features = _diagnosis_features(evidence)
+        for matches, template in _DIAGNOSIS_RULES:
+            if matches(features):
+                return _render_diagnosis(template, features)
+        return _render_diagnosis(_UNDIFFERENTIATED, features)
     
     async def _create_treatment_plan(self, diagnosis: Dict, evidence: Dict) -> Dict:
         """
@@ -303,7 +367,7 @@ class IntelligentClinicalDecisionAgent:
         
         # Get risk level
         risk_level = evidence['risk_assessment'].get('overall_risk', 'MODERATE')
-        primary_dx = diagnosis['primary'].lower()
+        primary_dx = _DIAGNOSIS_LOWER.get(diagnosis['primary']) or diagnosis['primary'].lower()
         confidence = diagnosis['confidence']
         
         # Determine disposition based on BOTH diagnosis AND risk
@@ -317,7 +381,7 @@ class IntelligentClinicalDecisionAgent:
                 plan['disposition'] = 'Admit to medical floor'
         elif risk_level == 'MODERATE':
             # For moderate risk, admission depends on diagnosis
-            if any(serious in primary_dx for serious in ['pneumonia', 'heart failure', 'sepsis', 'copd exacerbation']):
+            if _mentions(primary_dx, _SERIOUS_DX):
                 plan['disposition'] = 'Admit to medical floor'
             elif 'respiratory failure' in primary_dx or 'hypoxemic' in primary_dx:
                 plan['disposition'] = 'Admit for observation'
@@ -339,11 +403,10 @@ class IntelligentClinicalDecisionAgent:
             allergies = patient_data.get('medical_history', {}).get('allergies', [])
             
             # Check kidney function
-            kidney_dysfunction = blackboard.get_latest_finding('kidney_dysfunction')
-            gfr = kidney_dysfunction.get('egfr', 90) if kidney_dysfunction else 90
+            gfr = evidence['kidney_dysfunction'].get('egfr', 90)
             
             # Get CRP value to assess severity
-            crp = evidence['lab_analysis'].get('key_values', {}).get('crp', 0)
+            crp = evidence['crp']
             
             # If CRP > 1000, this is SEVERE regardless of other factors
             if crp and crp > 1000:
@@ -449,14 +512,14 @@ class IntelligentClinicalDecisionAgent:
             if our_dx.lower() not in consensus_dx.lower():
                 print(f"[{self.name}] 🤔 My diagnosis differs from consensus...")
                 
-                await blackboard.ask_question(
+                await self._ask_question(
                     self.agent_id,
                     f"I'm diagnosing {our_dx}, but others suggest {consensus_dx}. "
                     f"Can we review the key findings that support each diagnosis?",
                     target_agents=['LabAnalyzer', 'ImageAnalyzer', 'RiskStratifier']
                 )
     
-    async def _communicate_decisions(self, diagnosis: Dict, treatment_plan: Dict):
+    async def _communicate_decisions(self, diagnosis: Dict, treatment_plan: Dict, first_med: str):
         """
         Share clinical decisions with all agents
         """
@@ -468,57 +531,43 @@ class IntelligentClinicalDecisionAgent:
             'key_medications': treatment_plan['medications'][:2]
         }
         
-        await blackboard.post(
-            self.agent_id,
-            MessageType.FINDING,
-            "clinical_decision_complete",
-            decision_summary,
-            Priority.HIGH
-        )
-        
-        # Post opinion for consensus
-        opinion = f"Primary diagnosis: {diagnosis['primary'].replace('_', ' ')}. "
-        opinion += f"Disposition: {treatment_plan['disposition']}. "
-        opinion += f"Start {treatment_plan['medications'][0] if treatment_plan['medications'] else 'supportive care'}"
-        
-        blackboard.post_opinion(
-            self.agent_id,
-            "primary_diagnosis",
-            diagnosis['primary'],
-            confidence=diagnosis['confidence']
-        )
-        
-        blackboard.post_opinion(
-            self.agent_id,
-            "treatment_plan",
-            opinion,
-            confidence=diagnosis['confidence']
-        )
+        events = [(self._MT_FINDING, "clinical_decision_complete", decision_summary, self._P_HIGH)]
         
         # If critical patient, ensure everyone knows the plan
-        if any('CRITICAL' in str(alert) for alert in blackboard.active_alerts):
+        if blackboard.critical_count > 0:
             print(f"[{self.name}] 🚨 CRITICAL PATIENT - Broadcasting treatment plan!")
             
-            await blackboard.post(
-                self.agent_id,
-                MessageType.ALERT,
+            events.append((
+                self._MT_ALERT,
                 "critical_treatment_plan",
                 {
                     'diagnosis': diagnosis['primary'],
-                    'immediate_action': treatment_plan['immediate_interventions'][0],
+                    'immediate_action': next(iter(treatment_plan['immediate_interventions']), None),
                     'disposition': treatment_plan['disposition']
                 },
-                Priority.CRITICAL
-            )
+                self._P_CRITICAL
+            ))
+        
+        await self._post_many(self.agent_id, events)
+        
+        # Post opinion for consensus
+        opinion = f"Primary diagnosis: {diagnosis['primary'].replace('_', ' ')}. "
+        opinion += f"Disposition: {treatment_plan['disposition']}. "
+        opinion += f"Start {first_med}"
+        
+        blackboard.post_opinions(self.agent_id, [
+            ("primary_diagnosis", diagnosis['primary'], diagnosis['confidence']),
+            ("treatment_plan", opinion, diagnosis['confidence'])
+        ])
     
-    async def _seek_final_consensus(self, treatment_plan: Dict):
+    async def _seek_final_consensus(self, treatment_plan: Dict, first_med: str):
         """
         Seek final agreement from all agents
         """
-        await blackboard.ask_question(
+        await self._ask_question(
             self.agent_id,
             f"Final treatment plan: {treatment_plan['disposition']} with "
-            f"{treatment_plan['medications'][0] if treatment_plan['medications'] else 'supportive care'}. "
+            f"{first_med}. "
             f"Do all agents agree with this plan? Any concerns or modifications needed?",
             target_agents=['LabAnalyzer', 'ImageAnalyzer', 'RiskStratifier']
         )
@@ -541,25 +590,14 @@ class IntelligentClinicalDecisionAgent:
                 print(f"[{self.name}] 🚨 Critical patient - expediting treatment decisions!")
         
         # Respond to questions about treatment
-        elif topic.startswith("question_") and self.agent_id in str(message.get('target_agents', [])):
+        elif topic.startswith("question_") and self.agent_id in (message.get('target_agents') or ()):
             question = message.get('content', '')
             
             if "kidney" in question and "dosing" in question:
-                response = "Absolutely correct. With kidney dysfunction, we must adjust doses:\n"
-                response += "- Reduce beta-lactam antibiotics by 50%\n"
-                response += "- Avoid NSAIDs completely\n"
-                response += "- Monitor drug levels for vancomycin if used"
-                
-                await blackboard.respond_to_question(self.agent_id, topic, response)
+                await self._respond_to_question(self.agent_id, topic, _KIDNEY_DOSING_RESPONSE)
             
             elif "additional tests" in question:
-                response = "For pneumonia differential:\n"
-                response += "- Respiratory viral panel\n"
-                response += "- Legionella and pneumococcal antigens\n"
-                response += "- Procalcitonin to guide antibiotic duration\n"
-                response += "- Consider bronchoscopy if not improving"
-                
-                await blackboard.respond_to_question(self.agent_id, topic, response)
+                await self._respond_to_question(self.agent_id, topic, _ADDITIONAL_TESTS_RESPONSE)
 
 # Create the intelligent agent
 clinical_decision_maker = IntelligentClinicalDecisionAgent()
@@ -4,12 +4,70 @@ Intelligent Consensus Builder Agent that facilitates agreement among all agents
 import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from collections import defaultdict
+from dataclasses import dataclass, field, fields
+from collections import defaultdict, deque
 
-import sys
-sys.path.append('..')
 from core.blackboard import blackboard, MessageType, Priority
 
+# Diagnosis families grouped under one key, checked in order - anything else keeps its own name
+_DX_KEYS = (
+    ('pneumonia', 'pneumonia'),
+    ('sepsis', 'sepsis'),
+    ('heart', 'heart failure')
+)
+
+_DECISION_HISTORY = 64  # Decisions kept per agent
+
+def _opinion_confidence(opinion: Dict) -> float:
+    return opinion.get('confidence', 0)
+
+@dataclass(slots=True)
+class ConsensusResult:
+    """Final consensus, filled in step by step and handed out as a dict"""
+    primary_diagnosis: str = ''
+    confidence_level: str = ''
+    disposition: str = ''
+    key_interventions: List[str] = field(default_factory=list)
+    dissenting_opinions: List[str] = field(default_factory=list)
+    areas_of_agreement: List[str] = field(default_factory=list)
+    final_recommendation: str = ''
+
+    def to_dict(self) -> Dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+# Action plan protocols by diagnosis keyword, checked in order
+_PROTOCOLS = {
+    'sepsis': {
+        'immediate_actions': (
+            "Initiate sepsis protocol",
+            "IV access x2",
+            "Blood cultures before antibiotics"
+        ),
+        'within_1_hour': (
+            "Start broad-spectrum antibiotics",
+            "30mL/kg fluid bolus",
+            "Lactate level"
+        )
+    },
+    'pneumonia': {
+        'immediate_actions': (
+            "Supplemental oxygen",
+            "IV access",
+            "Blood cultures"
+        ),
+        'within_1_hour': (
+            "Start antibiotics",
+            "Chest X-ray if not done"
+        )
+    }
+}
+
+_DECISION_POINTS = (
+    "Reassess in 6 hours - if worsening, escalate care",
+    "Check response to antibiotics at 48 hours",
+    "Consider discharge when afebrile 24h and improving"
+)
+
 class IntelligentConsensusBuilder:
     """
     Consensus builder that ensures all agents reach agreement on patient care
@@ -27,7 +85,11 @@ class IntelligentConsensusBuilder:
             self.handle_event
         )
         
-        self.decision_tracking = defaultdict(list)
+        # Recent decisions per agent - the builder is a long-lived singleton, so keep it bounded
+        self.decision_tracking = defaultdict(lambda: deque(maxlen=_DECISION_HISTORY))
+        
+        # Open questions we are waiting on - set when the first response arrives
+        self._question_responses: Dict[str, asyncio.Event] = {}
         
     async def build_consensus(self) -> Dict[str, Any]:
         """
@@ -36,23 +98,23 @@ class IntelligentConsensusBuilder:
         print(f"\n[{self.name}] 🤝 Building consensus from all agent inputs...")
         
         # Collect all opinions
-        all_opinions = await self._collect_all_opinions()
+        all_opinions = self._collect_all_opinions()
         
         # Identify agreements and disagreements
-        analysis = await self._analyze_agreements(all_opinions)
+        analysis = self._analyze_agreements(all_opinions)
         
         # Resolve disagreements through discussion
         if analysis['disagreements']:
             await self._facilitate_disagreement_resolution(analysis['disagreements'])
         
         # Build final consensus
-        final_consensus = await self._build_final_consensus(analysis)
+        final_consensus = self._build_final_consensus(analysis)
         
         # Communicate consensus
         await self._communicate_consensus(final_consensus)
         
         # Create action plan
-        action_plan = await self._create_unified_action_plan(final_consensus)
+        action_plan = self._create_unified_action_plan(final_consensus)
         
         return {
             'consensus': final_consensus,
@@ -60,7 +122,7 @@ class IntelligentConsensusBuilder:
             'confidence': self._calculate_consensus_strength(analysis)
         }
     
-    async def _collect_all_opinions(self) -> Dict:
+    def _collect_all_opinions(self) -> Dict:
         """
         Collect opinions from all agents
         """
@@ -89,16 +151,17 @@ class IntelligentConsensusBuilder:
         if imaging_data:
             opinions['key_findings']['ImageAnalyzer'] = imaging_data.get('impression', '')
         
-        print(f"[{self.name}] Collected opinions from {len(set(sum([list(v.keys()) for v in opinions.values()], [])))} agents")
+        contributing_agents = {agent for by_agent in opinions.values() for agent in by_agent}
+        print(f"[{self.name}] Collected opinions from {len(contributing_agents)} agents")
         
         return opinions
     
-    async def _analyze_agreements(self, opinions: Dict) -> Dict:
+    def _analyze_agreements(self, opinions: Dict) -> Dict:
         """
         Analyze where agents agree and disagree
         """
         analysis = {
-            'agreements': [],
+            'agreements': {},  # topic -> agreement
             'disagreements': [],
             'partial_agreements': []
         }
@@ -112,29 +175,20 @@ class IntelligentConsensusBuilder:
             diagnosis_groups = defaultdict(list)
             for agent, diagnosis in diagnoses:
                 # Check for specific conditions first
-                if 'pneumonia' in diagnosis.lower():
-                    key = 'pneumonia'
-                elif 'sepsis' in diagnosis.lower():
-                    key = 'sepsis'
-                elif 'heart' in diagnosis.lower():
-                    key = 'heart failure'
-                elif 'bronchitis' in diagnosis.lower():
-                    key = diagnosis  # Keep the full diagnosis for bronchitis
-                elif 'respiratory' in diagnosis.lower():
-                    key = diagnosis  # Keep respiratory conditions
-                elif diagnosis.lower() != 'undifferentiated illness':
-                    key = diagnosis  # Keep any other specific diagnosis
-                else:
-                    key = 'undifferentiated'
+                low = diagnosis.lower()
+                key = next((group for term, group in _DX_KEYS if term in low), None)
+                if key is None:
+                    # Keep any other specific diagnosis (bronchitis, respiratory, ...) as is
+                    key = 'undifferentiated' if low == 'undifferentiated illness' else diagnosis
                 diagnosis_groups[key].append(agent)
             
             # Find majority
             if len(diagnosis_groups) == 1:
-                analysis['agreements'].append({
+                analysis['agreements']['diagnosis'] = {
                     'topic': 'diagnosis',
                     'consensus': list(diagnosis_groups.keys())[0],
                     'agents': list(diagnosis_groups.values())[0]
-                })
+                }
             else:
                 analysis['disagreements'].append({
                     'topic': 'diagnosis',
@@ -147,15 +201,21 @@ class IntelligentConsensusBuilder:
             dispositions = [(agent, data['opinion']) for agent, data in disposition_opinions.items()]
             
             # Check if all agree on admission vs discharge
-            admit_agents = [agent for agent, disp in dispositions if 'admit' in disp.lower() or 'icu' in disp.lower()]
-            discharge_agents = [agent for agent, disp in dispositions if 'discharge' in disp.lower()]
+            admit_agents, discharge_agents = [], []
+            for agent, disp in dispositions:
+                low = disp.lower()
+                if 'admit' in low or 'icu' in low:
+                    admit_agents.append(agent)
+                # Not elif - "admit, not discharge" style opinions count on both sides
+                if 'discharge' in low:
+                    discharge_agents.append(agent)
             
             if len(admit_agents) > 0 and len(discharge_agents) == 0:
-                analysis['agreements'].append({
+                analysis['agreements']['disposition'] = {
                     'topic': 'disposition',
                     'consensus': 'admit',
                     'agents': admit_agents
-                })
+                }
             elif len(admit_agents) > 0 and len(discharge_agents) > 0:
                 analysis['disagreements'].append({
                     'topic': 'disposition',
@@ -169,12 +229,23 @@ class IntelligentConsensusBuilder:
         """
         Help agents resolve disagreements through structured discussion
         """
-        for disagreement in disagreements:
-            topic = disagreement.get('topic')
-            
-            print(f"[{self.name}] 🤔 Disagreement detected on {topic}. Facilitating resolution...")
+        # Each disagreement waits on its own discussion, so run them side by side
+        await asyncio.gather(*map(self._resolve_disagreement, disagreements))
+    
+    async def _resolve_disagreement(self, disagreement: Dict):
+        """
+        Run the structured discussion for a single disagreement
+        """
+        topic = disagreement.get('topic')
+        
+        print(f"[{self.name}] 🤔 Disagreement detected on {topic}. Facilitating resolution...")
+        
+        if topic == 'diagnosis':
+            # ask_question numbers the question before it first awaits, so the id is known up front
+            question_id = f"question_{len(blackboard.pending_questions) + 1}"
+            response_event = self._question_responses[question_id] = asyncio.Event()
             
-            if topic == 'diagnosis':
+            try:
                 # Ask each group to present their evidence
                 await blackboard.ask_question(
                     self.agent_id,
@@ -183,99 +254,94 @@ class IntelligentConsensusBuilder:
                     target_agents=None  # All agents
                 )
                 
-                # Give agents time to respond
-                await asyncio.sleep(2)
-                
-                # Synthesize responses
-                await blackboard.post(
-                    self.agent_id,
-                    MessageType.FINDING,
-                    "diagnosis_debate_summary",
-                    {
-                        'disagreement': disagreement,
-                        'resolution_attempt': "Requesting evidence-based justification"
-                    },
-                    Priority.HIGH
-                )
+                # Give agents time to respond - returns as soon as someone does
+                try:
+                    await asyncio.wait_for(response_event.wait(), timeout=2.0)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                self._question_responses.pop(question_id, None)
             
-            elif topic == 'disposition':
-                # Present the dilemma
-                admit_count = len(disagreement.get('admit_agents', []))
-                discharge_count = len(disagreement.get('discharge_agents', []))
-                
-                await blackboard.post(
-                    self.agent_id,
-                    MessageType.FINDING,
-                    "disposition_disagreement",
-                    {
-                        'admit_votes': admit_count,
-                        'discharge_votes': discharge_count,
-                        'question': "Should we err on the side of caution?"
-                    },
-                    Priority.HIGH
-                )
-                
-                # In healthcare, safety first
-                if admit_count > 0:
-                    print(f"[{self.name}] Given the disagreement, recommending admission for safety")
+            # Synthesize responses
+            await blackboard.post(
+                self.agent_id,
+                MessageType.FINDING,
+                "diagnosis_debate_summary",
+                {
+                    'disagreement': disagreement,
+                    'resolution_attempt': "Requesting evidence-based justification"
+                },
+                Priority.HIGH
+            )
+        
+        elif topic == 'disposition':
+            # Present the dilemma
+            admit_count = len(disagreement.get('admit_agents', []))
+            discharge_count = len(disagreement.get('discharge_agents', []))
+            
+            await blackboard.post(
+                self.agent_id,
+                MessageType.FINDING,
+                "disposition_disagreement",
+                {
+                    'admit_votes': admit_count,
+                    'discharge_votes': discharge_count,
+                    'question': "Should we err on the side of caution?"
+                },
+                Priority.HIGH
+            )
+            
+            # In healthcare, safety first
+            if admit_count > 0:
+                print(f"[{self.name}] Given the disagreement, recommending admission for safety")
     
-    async def _build_final_consensus(self, analysis: Dict) -> Dict:
+    def _build_final_consensus(self, analysis: Dict) -> Dict:
         """
         Build the final consensus recommendation
         """
-        consensus = {
-            'primary_diagnosis': '',
-            'confidence_level': '',
-            'disposition': '',
-            'key_interventions': [],
-            'dissenting_opinions': [],
-            'areas_of_agreement': [],
-            'final_recommendation': ''
-        }
+        consensus = ConsensusResult()
+        
+        # The clinical decision backs diagnosis, disposition and interventions - read it once
+        clinical_decision = blackboard.get_latest_finding('clinical_decision_complete') or {}
         
         # Diagnosis consensus
-        if analysis['agreements']:
-            diagnosis_agreement = next((a for a in analysis['agreements'] if a['topic'] == 'diagnosis'), None)
-            if diagnosis_agreement:
-                consensus['primary_diagnosis'] = diagnosis_agreement['consensus']
-                consensus['areas_of_agreement'].append("Diagnosis")
+        diagnosis_agreement = analysis['agreements'].get('diagnosis')
+        if diagnosis_agreement:
+            consensus.primary_diagnosis = diagnosis_agreement['consensus']
+            consensus.areas_of_agreement.append("Diagnosis")
         
         # If no agreement, use the clinical decision diagnosis
-        if consensus['primary_diagnosis'] == '':
-            clinical_decision = blackboard.get_latest_finding('clinical_decision_complete')
-            if clinical_decision and clinical_decision.get('primary_diagnosis'):
-                consensus['primary_diagnosis'] = clinical_decision['primary_diagnosis']
-                consensus['dissenting_opinions'].append("Using clinical decision diagnosis")
+        if consensus.primary_diagnosis == '':
+            if clinical_decision.get('primary_diagnosis'):
+                consensus.primary_diagnosis = clinical_decision['primary_diagnosis']
+                consensus.dissenting_opinions.append("Using clinical decision diagnosis")
             else:
                 # Use the most confident diagnosis
                 diagnosis_opinions = blackboard.agent_opinions.get('primary_diagnosis', {})
                 if diagnosis_opinions:
-                    best_diagnosis = max(diagnosis_opinions.items(), 
-                                       key=lambda x: x[1].get('confidence', 0))
-                    consensus['primary_diagnosis'] = best_diagnosis[1]['opinion']
-                    consensus['dissenting_opinions'].append("Diagnosis remains debated")
+                    best_diagnosis = max(diagnosis_opinions.values(), key=_opinion_confidence)
+                    consensus.primary_diagnosis = best_diagnosis['opinion']
+                    consensus.dissenting_opinions.append("Diagnosis remains debated")
         
         # Disposition consensus
-        clinical_decision = blackboard.get_latest_finding('clinical_decision_complete')
-        if clinical_decision and clinical_decision.get('disposition'):
+        if clinical_decision.get('disposition'):
             # Use the Clinical Decision's disposition directly
-            consensus['disposition'] = clinical_decision['disposition']
-            consensus['areas_of_agreement'].append("Disposition")
+            consensus.disposition = clinical_decision['disposition']
+            consensus.areas_of_agreement.append("Disposition")
         else:
             # Fallback to old logic
-            disposition_agreement = next((a for a in analysis['agreements'] if a['topic'] == 'disposition'), None)
+            disposition_agreement = analysis['agreements'].get('disposition')
             if disposition_agreement:
-                consensus['disposition'] = disposition_agreement['consensus']
-                consensus['areas_of_agreement'].append("Disposition")
+                consensus.disposition = disposition_agreement['consensus']
+                consensus.areas_of_agreement.append("Disposition")
             else:
                 # Default to safer option
-                consensus['disposition'] = "Admit for observation"
-                consensus['dissenting_opinions'].append("Disposition debated - defaulting to admission")
+                consensus.disposition = "Admit for observation"
+                consensus.dissenting_opinions.append("Disposition debated - defaulting to admission")
         
         # Get treatment recommendations
-        clinical_decision = blackboard.get_latest_finding('clinical_decision_complete')
         if clinical_decision:
-            consensus['key_interventions'] = clinical_decision.get('immediate_actions', [])
+            consensus.key_interventions = clinical_decision.get('immediate_actions', [])
         
         # Calculate confidence
         agreement_count = len(analysis['agreements'])
@@ -284,30 +350,30 @@ class IntelligentConsensusBuilder:
         if total_topics > 0:
             agreement_ratio = agreement_count / total_topics
             if agreement_ratio > 0.8:
-                consensus['confidence_level'] = "HIGH - Strong consensus"
+                consensus.confidence_level = "HIGH - Strong consensus"
             elif agreement_ratio > 0.5:
-                consensus['confidence_level'] = "MODERATE - Partial consensus"
+                consensus.confidence_level = "MODERATE - Partial consensus"
             else:
-                consensus['confidence_level'] = "LOW - Significant disagreement"
+                consensus.confidence_level = "LOW - Significant disagreement"
         
         # Final recommendation
-        consensus['final_recommendation'] = self._generate_final_recommendation(consensus)
+        consensus.final_recommendation = self._generate_final_recommendation(consensus)
         
-        return consensus
+        return consensus.to_dict()
     
-    def _generate_final_recommendation(self, consensus: Dict) -> str:
+    def _generate_final_recommendation(self, consensus: ConsensusResult) -> str:
         """
         Generate a clear final recommendation
         """
         rec = f"CONSENSUS RECOMMENDATION: "
-        rec += f"{consensus['primary_diagnosis']}. "
-        rec += f"{consensus['disposition']}. "
+        rec += f"{consensus.primary_diagnosis}. "
+        rec += f"{consensus.disposition}. "
         
-        if consensus['key_interventions']:
-            rec += f"Immediate actions: {', '.join(consensus['key_interventions'][:2])}. "
+        if consensus.key_interventions:
+            rec += f"Immediate actions: {', '.join(consensus.key_interventions[:2])}. "
         
-        if consensus['dissenting_opinions']:
-            rec += f"Note: {', '.join(consensus['dissenting_opinions'])}"
+        if consensus.dissenting_opinions:
+            rec += f"Note: {', '.join(consensus.dissenting_opinions)}"
         
         return rec
     
@@ -324,10 +390,13 @@ class IntelligentConsensusBuilder:
             Priority.HIGH
         )
         
-        print(f"\n[{self.name}] ✅ CONSENSUS REACHED:")
-        print(f"  Diagnosis: {consensus['primary_diagnosis']}")
-        print(f"  Disposition: {consensus['disposition']}")
-        print(f"  Confidence: {consensus['confidence_level']}")
+        # One write for the whole summary
+        print(
+            f"\n[{self.name}] ✅ CONSENSUS REACHED:\n"
+            f"  Diagnosis: {consensus['primary_diagnosis']}\n"
+            f"  Disposition: {consensus['disposition']}\n"
+            f"  Confidence: {consensus['confidence_level']}"
+        )
         
         # Post final opinion
         blackboard.post_opinion(
@@ -337,7 +406,7 @@ class IntelligentConsensusBuilder:
             confidence=0.9
         )
     
-    async def _create_unified_action_plan(self, consensus: Dict) -> Dict:
+    def _create_unified_action_plan(self, consensus: Dict) -> Dict:
         """
         Create a unified action plan based on consensus
         """
@@ -350,35 +419,14 @@ class IntelligentConsensusBuilder:
         }
         
         # Based on consensus diagnosis and disposition
-        if 'sepsis' in consensus['primary_diagnosis'].lower():
-            action_plan['immediate_actions'] = [
-                "Initiate sepsis protocol",
-                "IV access x2",
-                "Blood cultures before antibiotics"
-            ]
-            action_plan['within_1_hour'] = [
-                "Start broad-spectrum antibiotics",
-                "30mL/kg fluid bolus",
-                "Lactate level"
-            ]
-        
-        elif 'pneumonia' in consensus['primary_diagnosis'].lower():
-            action_plan['immediate_actions'] = [
-                "Supplemental oxygen",
-                "IV access",
-                "Blood cultures"
-            ]
-            action_plan['within_1_hour'] = [
-                "Start antibiotics",
-                "Chest X-ray if not done"
-            ]
+        low = consensus['primary_diagnosis'].lower()
+        protocol = next((steps for term, steps in _PROTOCOLS.items() if term in low), None)
+        if protocol:
+            action_plan['immediate_actions'] = list(protocol['immediate_actions'])
+            action_plan['within_1_hour'] = list(protocol['within_1_hour'])
         
         # Add decision points
-        action_plan['decision_points'] = [
-            "Reassess in 6 hours - if worsening, escalate care",
-            "Check response to antibiotics at 48 hours",
-            "Consider discharge when afebrile 24h and improving"
-        ]
+        action_plan['decision_points'] = list(_DECISION_POINTS)
         
         return action_plan
     
@@ -398,6 +446,10 @@ class IntelligentConsensusBuilder:
         """
         Handle events from other agents
         """
+        # Wake up anyone waiting on answers to one of our questions
+        if message.get('type') == MessageType.RESPONSE.value and topic in self._question_responses:
+            self._question_responses[topic].set()
+        
         # Track all decisions
         if topic.endswith('_complete'):
             agent = message.get('agent_id', 'Unknown')
@@ -5,8 +5,6 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
-import sys
-sys.path.append('..')
 from core.blackboard import blackboard, MessageType, Priority
 from utils.medical_intelligence import MedicalIntelligence
 
@@ -28,6 +26,10 @@ class IntelligentImageAnalyzerAgent:
         )
         
         self.medical_intel = MedicalIntelligence()
+        
+        # Event dispatch - exact topics first, then topic prefixes
+        self._exact_handlers = {"severe_infection_detected": self._on_severe_infection}
+        self._prefix_handlers = (("question_", self._on_question),)
     
     async def analyze(self, xray_findings: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -41,11 +43,16 @@ class IntelligentImageAnalyzerAgent:
         # Enhanced analysis based on context
         enhanced_findings = await self._contextual_image_analysis(xray_findings, context)
         
+        # Both the lab correlation and the alerts key off what the impression names
+        impression = enhanced_findings['clinical_impression'].lower()
+        shows_pneumonia = 'pneumonia' in impression
+        shows_heart_failure = 'heart failure' in impression
+        
         # Correlate with lab findings
-        correlations = await self._correlate_with_labs(enhanced_findings)
+        correlations = await self._correlate_with_labs(enhanced_findings, context, shows_pneumonia, shows_heart_failure)
         
         # Post findings for other agents
-        await self._communicate_findings(enhanced_findings, correlations)
+        await self._communicate_findings(enhanced_findings, correlations, shows_pneumonia)
         
         # Build consensus with other agents
         await self._seek_consensus(enhanced_findings)
@@ -109,11 +116,12 @@ class IntelligentImageAnalyzerAgent:
                 # Determine location
                 if 'findings' in xray_findings:
                     for finding in xray_findings['findings']:
-                        if 'right' in finding.lower():
+                        finding_lower = finding.lower()
+                        if 'right' in finding_lower:
                             enhanced['primary_findings'].append("Right-sided predominance")
-                        elif 'left' in finding.lower():
+                        elif 'left' in finding_lower:
                             enhanced['primary_findings'].append("Left-sided predominance")
-                        elif 'bilateral' in finding.lower():
+                        elif 'bilateral' in finding_lower:
                             enhanced['primary_findings'].append("Bilateral involvement - consider atypical pneumonia or ARDS")
                 
             elif infiltration_prob > 0.5:
@@ -155,20 +163,21 @@ class IntelligentImageAnalyzerAgent:
         
         return enhanced
     
-    async def _correlate_with_labs(self, enhanced_findings: Dict) -> List[str]:
+    async def _correlate_with_labs(self, enhanced_findings: Dict, context: Dict,
+                                   shows_pneumonia: bool, shows_heart_failure: bool) -> List[str]:
         """
         Correlate imaging findings with lab results
         """
         correlations = []
         
-        lab_summary = blackboard.get_latest_finding('lab_analysis_complete')
+        lab_summary = context.get('lab_summary')
         if not lab_summary:
             return ["No lab data available for correlation"]
         
         key_labs = lab_summary.get('key_values', {})
         
         # Pneumonia correlation
-        if 'pneumonia' in enhanced_findings['clinical_impression'].lower():
+        if shows_pneumonia:
             wbc = key_labs.get('wbc', 0)
             crp = key_labs.get('crp', 0)
             
@@ -192,7 +201,7 @@ class IntelligentImageAnalyzerAgent:
                 )
         
         # Heart failure correlation
-        if 'heart failure' in enhanced_findings['clinical_impression'].lower():
+        if shows_heart_failure:
             bnp = key_labs.get('bnp', 0)
             
             if bnp > 400:
@@ -206,13 +215,13 @@ class IntelligentImageAnalyzerAgent:
         
         return correlations
     
-    async def _communicate_findings(self, enhanced_findings: Dict, correlations: List[str]):
+    async def _communicate_findings(self, enhanced_findings: Dict, correlations: List[str],
+                                    shows_pneumonia: bool):
         """
         Share findings with other agents
         """
-        # Post primary analysis
-        await blackboard.post(
-            self.agent_id,
+        # Primary analysis, plus the pneumonia alert if it applies - posted together
+        events = [(
             MessageType.FINDING,
             "xray_analysis_complete",
             {
@@ -222,21 +231,32 @@ class IntelligentImageAnalyzerAgent:
                 'correlations': correlations
             },
             Priority.HIGH if enhanced_findings['primary_findings'] else Priority.NORMAL
-        )
+        )]
         
         # If pneumonia confirmed, alert everyone
-        if 'pneumonia' in enhanced_findings['clinical_impression'].lower() and enhanced_findings['confidence'] > 0.7:
-            await blackboard.post(
-                self.agent_id,
+        if shows_pneumonia and enhanced_findings['confidence'] > 0.7:
+            # One pass for location (first sided/bilateral finding) and severity (any bilateral)
+            location, severity = None, 'Moderate'
+            for finding in enhanced_findings['primary_findings']:
+                if 'bilateral' in finding:
+                    location = location or finding
+                    severity = 'Severe'
+                    break
+                if location is None and 'sided' in finding:
+                    location = finding
+            
+            events.append((
                 MessageType.ALERT,
                 "pneumonia_confirmed_on_imaging",
                 {
                     'type': 'Bacterial pneumonia likely' if any('bacterial' in c for c in correlations) else 'Pneumonia',
-                    'location': next((f for f in enhanced_findings['primary_findings'] if 'sided' in f or 'bilateral' in f), 'Not specified'),
-                    'severity': 'Severe' if 'bilateral' in str(enhanced_findings['primary_findings']) else 'Moderate'
+                    'location': location or 'Not specified',
+                    'severity': severity
                 },
                 Priority.HIGH
-            )
+            ))
+        
+        await blackboard.post_many(self.agent_id, events)
     
     async def _seek_consensus(self, enhanced_findings: Dict):
         """
@@ -266,26 +286,36 @@ class IntelligentImageAnalyzerAgent:
         """
         print(f"[{self.name}] Received event: {topic}")
         
-        # If severe infection detected, offer to re-review imaging
-        if topic == "severe_infection_detected":
-            print(f"[{self.name}] 🔍 Severe infection detected by labs - let me look more carefully for subtle pneumonia...")
-            
-            # Post acknowledgment
-            await blackboard.post(
-                self.agent_id,
-                MessageType.RESPONSE,
-                "reviewing_for_infection",
-                "Re-examining imaging for subtle signs of pneumonia given lab findings",
-                Priority.HIGH
-            )
+        handler = self._exact_handlers.get(topic)
+        if handler is None:
+            handler = next((h for prefix, h in self._prefix_handlers if topic.startswith(prefix)), None)
+        if handler is not None:
+            await handler(topic, message)
+    
+    async def _on_severe_infection(self, topic: str, message: Dict):
+        """
+        Labs found a severe infection - offer to re-review imaging
+        """
+        print(f"[{self.name}] 🔍 Severe infection detected by labs - let me look more carefully for subtle pneumonia...")
         
-        # Respond to questions
-        elif topic.startswith("question_"):
-            question = message.get('content', '')
-            if "additional tests" in question and self.agent_id in str(message.get('target_agents', [])):
-                response = "For pneumonia vs atypical pneumonia: Consider CT chest for better characterization. "
-                response += "Also recommend blood cultures and respiratory pathogen panel."
-                await blackboard.respond_to_question(self.agent_id, topic, response)
+        # Post acknowledgment
+        await blackboard.post(
+            self.agent_id,
+            MessageType.RESPONSE,
+            "reviewing_for_infection",
+            "Re-examining imaging for subtle signs of pneumonia given lab findings",
+            Priority.HIGH
+        )
+    
+    async def _on_question(self, topic: str, message: Dict):
+        """
+        Answer questions addressed to imaging
+        """
+        question = message.get('content', '')
+        if "additional tests" in question and self.agent_id in (message.get('target_agents') or ()):
+            response = "For pneumonia vs atypical pneumonia: Consider CT chest for better characterization. "
+            response += "Also recommend blood cultures and respiratory pathogen panel."
+            await blackboard.respond_to_question(self.agent_id, topic, response)
 
 # Create the intelligent agent
 image_analyzer = IntelligentImageAnalyzerAgent()
@@ -2,15 +2,43 @@
 Intelligent Lab Analyzer Agent that communicates and uses medical reasoning
 """
 import asyncio
-from typing import Dict, List, Any, Optional
+import math
+from typing import Dict, List, Any, Optional, Set
 from datetime import datetime
+from functools import lru_cache
 
 # Import our new modules
-import sys
-sys.path.append('..')
 from core.blackboard import blackboard, MessageType, Priority
 from utils.medical_intelligence import MedicalIntelligence, ClinicalPatterns
 
+# Simplified CKD-EPI terms in log space: (ln scale, creatinine exponent, ln creatinine divisor)
+_EGFR_FEMALE = (math.log(144), -0.329, math.log(0.7))
+_EGFR_MALE = (math.log(141), -0.411, math.log(0.9))
+_LN_AGE_DECAY = math.log(0.993)
+
+# Lab limits per test: (low, high, critical_low, critical_high) - None where a limit doesn't apply
+_CRITICAL_RANGES = {
+    'potassium': (2.5, 6.5, 2.0, 7.0),
+    'sodium': (120, 160, None, None),
+    'glucose': (40, 500, None, None),
+    'creatinine': (None, 3.0, None, None),
+    'wbc': (2.0, 20.0, None, None),
+    'hemoglobin': (7.0, None, None, None),
+    'platelets': (20, 1000, None, None),
+    'inr': (None, 5.0, None, None),
+    'lactate': (None, 4.0, None, None),
+    'troponin': (None, 0.04, None, None),
+    'bnp': (None, 900, None, None),
+    'crp': (None, 100, None, None),
+    'procalcitonin': (None, 2.0, None, None)
+}
+
+# Labs other agents read straight off the summary
+_KEY_VALUE_TESTS = frozenset({'wbc', 'crp', 'creatinine', 'bnp', 'troponin', 'lactate'})
+
+# Findings from other agents the lab analysis reads
+_CONTEXT_TOPICS = ('patient_vitals', 'patient_age', 'patient_gender', 'xray_analysis', 'lab_wbc', 'lab_crp')
+
 class IntelligentLabAnalyzerAgent:
     """
     Lab Analyzer that actually thinks and communicates
@@ -30,6 +58,12 @@ class IntelligentLabAnalyzerAgent:
         # Medical knowledge
         self.medical_intel = MedicalIntelligence()
         self.patterns = ClinicalPatterns()
+        
+        # Event dispatch by topic prefix
+        self._prefix_handlers = (
+            ("question_", self._on_question),
+            ("xray_", self._on_xray)
+        )
     
     async def analyze(self, lab_values: Dict[str, float]) -> Dict[str, Any]:
         """
@@ -46,20 +80,23 @@ class IntelligentLabAnalyzerAgent:
             'recommendations': []
         }
         
+        # Everything this analysis reads from other agents, fetched once
+        context = blackboard.get_latest_findings(_CONTEXT_TOPICS)
+        
         # 1. Check each lab value intelligently
         await self._analyze_individual_values(lab_values, findings)
         
         # 2. Look for patterns
-        await self._identify_clinical_patterns(lab_values, findings)
+        pattern_flags = await self._identify_clinical_patterns(lab_values, findings, context)
         
         # 3. Correlate with other findings if available
-        await self._correlate_with_other_data(findings)
+        await self._correlate_with_other_data(findings, context)
         
         # 4. Post findings to blackboard for other agents
         await self._communicate_findings(findings, lab_values)
         
         # 5. Ask questions if needed
-        await self._ask_clarifying_questions(findings)
+        await self._ask_clarifying_questions(pattern_flags)
         
         return findings
     
@@ -67,78 +104,71 @@ class IntelligentLabAnalyzerAgent:
         """
         Analyze each lab value with clinical context
         """
-        critical_ranges = {
-            'potassium': {'low': 2.5, 'high': 6.5, 'critical_low': 2.0, 'critical_high': 7.0},
-            'sodium': {'low': 120, 'high': 160},
-            'glucose': {'low': 40, 'high': 500},
-            'creatinine': {'high': 3.0},
-            'wbc': {'low': 2.0, 'high': 20.0},
-            'hemoglobin': {'low': 7.0},
-            'platelets': {'low': 20, 'high': 1000},
-            'inr': {'high': 5.0},
-            'lactate': {'high': 4.0},
-            'troponin': {'high': 0.04},
-            'bnp': {'high': 900},
-            'crp': {'high': 100},
-            'procalcitonin': {'high': 2.0}
-        }
+        critical_alerts = []
         
         for test, value in lab_values.items():
-            if value is None or test not in critical_ranges:
+            ranges = _CRITICAL_RANGES.get(test)
+            if value is None or ranges is None:
                 continue
             
-            ranges = critical_ranges[test]
+            low, high, critical_low, critical_high = ranges
             
             # Check critical values
-            if 'critical_high' in ranges and value > ranges['critical_high']:
-                finding = f"CRITICAL {test.upper()}: {value} (life-threatening high)"
-                findings['critical_findings'].append(finding)
-                
-                # Post critical alert
-                await blackboard.post(
-                    self.agent_id,
-                    MessageType.ALERT,
-                    f"critical_{test}",
-                    {'test': test, 'value': value, 'severity': 'CRITICAL'},
-                    Priority.CRITICAL
-                )
-                
-            elif 'critical_low' in ranges and value < ranges.get('critical_low', 0):
-                finding = f"CRITICAL {test.upper()}: {value} (life-threatening low)"
+            if critical_high is not None and value > critical_high:
+                direction = 'high'
+            elif critical_low is not None and value < critical_low:
+                direction = 'low'
+            else:
+                direction = None
+            
+            if direction:
+                finding = f"CRITICAL {test.upper()}: {value} (life-threatening {direction})"
                 findings['critical_findings'].append(finding)
                 
-                await blackboard.post(
-                    self.agent_id,
+                # Queue critical alert
+                critical_alerts.append((
                     MessageType.ALERT,
                     f"critical_{test}",
                     {'test': test, 'value': value, 'severity': 'CRITICAL'},
                     Priority.CRITICAL
-                )
+                ))
             
             # Check abnormal values
-            elif 'high' in ranges and value > ranges['high']:
+            elif high is not None and value > high:
                 finding = f"{test.upper()} elevated: {value}"
                 findings['abnormal_values'].append(finding)
                 
-            elif 'low' in ranges and value < ranges['low']:
+            elif low is not None and value < low:
                 finding = f"{test.upper()} low: {value}"
                 findings['abnormal_values'].append(finding)
+        
+        # Post every critical alert as one batch
+        if critical_alerts:
+            await blackboard.post_many(self.agent_id, critical_alerts)
     
-    async def _identify_clinical_patterns(self, lab_values: Dict, findings: Dict):
+    async def _identify_clinical_patterns(self, lab_values: Dict, findings: Dict, context: Dict) -> Set[str]:
         """
         Look for clinical patterns in the labs
+        
+        Returns the pattern families found ('infection', 'kidney') for follow-up questions
         """
+        pattern_flags = set()
+        
+        # The pattern checks don't depend on each other - work them all out, then post once
+        events = []
+        
         # Check for infection pattern
-        vitals = blackboard.get_latest_finding('patient_vitals') or {}
+        vitals = context['patient_vitals'] or {}
         infection_pattern = self.patterns.identify_infection_pattern(lab_values, vitals)
         
         if infection_pattern:
             findings['patterns_identified'].append(infection_pattern)
+            if 'INFECTION' in infection_pattern:
+                pattern_flags.add('infection')
             
             # Communicate the pattern
             if infection_pattern == "SEVERE_BACTERIAL_INFECTION":
-                await blackboard.post(
-                    self.agent_id,
+                events.append((
                     MessageType.FINDING,
                     "severe_infection_detected",
                     {
@@ -147,11 +177,10 @@ class IntelligentLabAnalyzerAgent:
                         'recommendation': "Start empiric antibiotics IMMEDIATELY"
                     },
                     Priority.HIGH
-                )
+                ))
             
             elif infection_pattern == "SEPSIS_PATTERN":
-                await blackboard.post(
-                    self.agent_id,
+                events.append((
                     MessageType.ALERT,
                     "sepsis_suspected",
                     {
@@ -160,15 +189,14 @@ class IntelligentLabAnalyzerAgent:
                         'action': "INITIATE SEPSIS PROTOCOL"
                     },
                     Priority.CRITICAL
-                )
+                ))
         
         # Check for cardiac pattern
         cardiac_pattern = self.patterns.identify_cardiac_pattern(lab_values, vitals)
         if cardiac_pattern:
             findings['patterns_identified'].append(cardiac_pattern)
             
-            await blackboard.post(
-                self.agent_id,
+            events.append((
                 MessageType.FINDING,
                 "cardiac_issue_detected",
                 {
@@ -177,19 +205,19 @@ class IntelligentLabAnalyzerAgent:
                     'troponin': lab_values.get('troponin')
                 },
                 Priority.HIGH
-            )
+            ))
         
         # Check for kidney dysfunction
         creatinine = lab_values.get('creatinine')
         if creatinine and creatinine > 1.5:
             egfr = self._calculate_egfr(creatinine, 
-                                       blackboard.get_latest_finding('patient_age') or 50,
-                                       blackboard.get_latest_finding('patient_gender') or 'M')
+                                       context['patient_age'] or 50,
+                                       context['patient_gender'] or 'M')
             
             findings['patterns_identified'].append(f"KIDNEY_DYSFUNCTION (eGFR: {egfr})")
+            pattern_flags.add('kidney')
             
-            await blackboard.post(
-                self.agent_id,
+            events.append((
                 MessageType.FINDING,
                 "kidney_dysfunction",
                 {
@@ -199,19 +227,24 @@ class IntelligentLabAnalyzerAgent:
                     'impact': "Adjust medication dosing"
                 },
                 Priority.HIGH
-            )
+            ))
+        
+        if events:
+            await blackboard.post_many(self.agent_id, events)
+        
+        return pattern_flags
     
-    async def _correlate_with_other_data(self, findings: Dict):
+    async def _correlate_with_other_data(self, findings: Dict, context: Dict):
         """
         Correlate lab findings with other agent findings
         """
         # Check if imaging found anything
-        xray_findings = blackboard.get_latest_finding('xray_analysis')
+        xray_findings = context['xray_analysis']
         
         if xray_findings and 'pneumonia' in str(xray_findings).lower():
             # We have pneumonia on X-ray, check inflammatory markers
-            wbc = blackboard.get_latest_finding('lab_wbc')
-            crp = blackboard.get_latest_finding('lab_crp')
+            wbc = context['lab_wbc']
+            crp = context['lab_crp']
             
             if wbc and wbc > 15 and crp and crp > 50:
                 correlation = "Lab findings STRONGLY support bacterial pneumonia diagnosis"
@@ -243,8 +276,7 @@ class IntelligentLabAnalyzerAgent:
             'critical_count': len(findings['critical_findings']),
             'abnormal_count': len(findings['abnormal_values']),
             'patterns': findings['patterns_identified'],
-            'key_values': {k: v for k, v in lab_values.items() 
-                          if k in ['wbc', 'crp', 'creatinine', 'bnp', 'troponin', 'lactate']}
+            'key_values': {k: v for k, v in lab_values.items() if k in _KEY_VALUE_TESTS}
         }
         
         await blackboard.post(
@@ -268,12 +300,12 @@ class IntelligentLabAnalyzerAgent:
                     Priority.CRITICAL
                 )
     
-    async def _ask_clarifying_questions(self, findings: Dict):
+    async def _ask_clarifying_questions(self, pattern_flags: Set[str]):
         """
         Ask other agents questions based on findings
         """
         # If we found infection markers, ask imaging about pneumonia
-        if any('INFECTION' in p for p in findings['patterns_identified']):
+        if 'infection' in pattern_flags:
             await blackboard.ask_question(
                 self.agent_id,
                 "ImageAnalyzer, given the elevated infection markers (WBC, CRP), do you see any signs of pneumonia or other infection sources on imaging?",
@@ -281,7 +313,7 @@ class IntelligentLabAnalyzerAgent:
             )
         
         # If kidney dysfunction, ask about medications
-        if any('KIDNEY' in p for p in findings['patterns_identified']):
+        if 'kidney' in pattern_flags:
             await blackboard.ask_question(
                 self.agent_id,
                 "ClinicalDecision agent, patient has kidney dysfunction. Should we adjust antibiotic dosing?",
@@ -294,15 +326,25 @@ class IntelligentLabAnalyzerAgent:
         """
         print(f"[{self.name}] Received event: {topic}")
         
-        # Respond to questions
-        if topic.startswith("question_") and self.agent_id in message.get('content', ''):
+        handler = next((h for prefix, h in self._prefix_handlers if topic.startswith(prefix)), None)
+        if handler is not None:
+            await handler(topic, message)
+    
+    async def _on_question(self, topic: str, message: Dict):
+        """
+        Respond to questions that name this agent
+        """
+        if self.agent_id in message.get('content', ''):
             await self._respond_to_question(topic, message)
-        
-        # React to X-ray findings
-        elif topic.startswith("xray_") and "pneumonia" in str(message.get('content', '')).lower():
+    
+    async def _on_xray(self, topic: str, message: Dict):
+        """
+        React to X-ray findings
+        """
+        if "pneumonia" in str(message.get('content', '')).lower():
             print(f"[{self.name}] X-ray shows pneumonia - let me check inflammatory markers...")
             # Re-evaluate labs in context of pneumonia
-            
+    
     async def _respond_to_question(self, question_id: str, message: Dict):
         """
         Respond to questions from other agents
@@ -313,19 +355,22 @@ class IntelligentLabAnalyzerAgent:
             response = "Yes, with the current kidney function, we should reduce antibiotic doses by 50% and avoid nephrotoxic medications."
             await blackboard.respond_to_question(self.agent_id, question_id, response)
     
-    def _calculate_egfr(self, creatinine: float, age: int, gender: str) -> float:
+    # Pure functions of their inputs - re-analysis of the same patient hits the cache
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _calculate_egfr(creatinine: float, age: int, gender: str) -> float:
         """
         Calculate estimated GFR using CKD-EPI equation (simplified)
         """
-        # Simplified calculation
-        if gender.upper() == 'F':
-            egfr = 144 * (creatinine / 0.7) ** -0.329 * 0.993 ** age
-        else:
-            egfr = 141 * (creatinine / 0.9) ** -0.411 * 0.993 ** age
+        # Simplified calculation - both powers folded into a single exp
+        ln_scale, exponent, ln_divisor = _EGFR_FEMALE if gender.upper() == 'F' else _EGFR_MALE
+        egfr = math.exp(ln_scale + exponent * (math.log(creatinine) - ln_divisor) + age * _LN_AGE_DECAY)
         
         return round(egfr, 1)
     
-    def _get_ckd_stage(self, egfr: float) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_ckd_stage(egfr: float) -> str:
         """
         Get CKD stage from eGFR
         """
@@ -2,6 +2,7 @@
 Intelligent Risk Stratification Agent that uses multiple scoring systems
 """
 import asyncio
+import re
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
@@ -10,11 +11,78 @@ sys.path.append('..')
 from core.blackboard import blackboard, MessageType, Priority
 from utils.medical_intelligence import MedicalIntelligence, RiskLevel, ClinicalScore
 
+# Chronic conditions that raise risk - matched anywhere in the condition text, as the
+# old lowercase substring checks did (so "prediabetes" still counts)
+_HIGH_RISK_CONDITIONS_RE = re.compile(r'diabetes|heart failure|copd|kidney disease|immunosuppression', re.IGNORECASE)
+
+# Cap on risk_factors - critical alerts keep arriving after analyze() returns, and
+# the list is shared live with the returned assessment, so growth is bounded here
+_MAX_RISK_FACTORS = 32
+
+_PNEUMONIA_RE = re.compile(r'pneumonia', re.IGNORECASE)
+_BILATERAL_RE = re.compile(r'bilateral', re.IGNORECASE)
+
+# Disposition, monitoring level and recommendations per overall risk level
+_RISK_PLANS = {
+    RiskLevel.CRITICAL: (
+        "ICU admission required",
+        "Continuous monitoring",
+        (
+            "IMMEDIATE ICU transfer",
+            "Continuous cardiac and O2 monitoring",
+            "Arterial line for BP monitoring",
+            "Central line access",
+            "Prepare for intubation if needed",
+            "Initiate appropriate protocols (sepsis, ACS, etc.)",
+            "Notify critical care team"
+        )
+    ),
+    RiskLevel.HIGH: (
+        "Admit to step-down/telemetry unit",
+        "Enhanced monitoring",
+        (
+            "Admit to monitored bed",
+            "Vital signs q2h",
+            "Continuous pulse oximetry",
+            "Daily labs",
+            "Rapid response team awareness",
+            "Consider ICU if deteriorates"
+        )
+    ),
+    RiskLevel.MODERATE: (
+        "Admit to medical floor",
+        "Standard monitoring",
+        (
+            "Admit for observation",
+            "Vital signs q4h",
+            "Daily labs",
+            "Monitor response to treatment",
+            "Consider discharge in 24-48h if improving"
+        )
+    ),
+    RiskLevel.LOW: (
+        "Consider discharge with close follow-up",
+        "Outpatient",
+        (
+            "Discharge home if stable",
+            "Primary care follow-up in 24-48 hours",
+            "Return precautions given",
+            "Home monitoring instructions",
+            "Clear discharge criteria met"
+        )
+    )
+}
+
 class IntelligentRiskStratificationAgent:
     """
     Risk assessment agent that uses real medical scoring and debates with other agents
     """
     
+    __slots__ = (
+        'agent_id', 'name', 'medical_intel', 'patient_data',
+        'risk_factors', '_critical_lab_count'
+    )
+    
     def __init__(self):
         self.agent_id = "RiskStratifier"
         self.name = "Dr. RiskAnalyst"
@@ -31,6 +99,7 @@ class IntelligentRiskStratificationAgent:
         self.medical_intel = MedicalIntelligence()
         self.patient_data = {}
         self.risk_factors = []
+        self._critical_lab_count = 0  # "Critical lab" entries in risk_factors
         
     async def analyze(self, patient_data: Dict) -> Dict[str, Any]:
         """
@@ -43,10 +112,12 @@ class IntelligentRiskStratificationAgent:
         
         # Clear risk factors for each patient - FIX THE ACCUMULATION BUG
         self.risk_factors = []
+        self._critical_lab_count = 0
         
-        # Get lab data from blackboard
+        # Get lab data from blackboard - read once, every step below works from these
         lab_summary = blackboard.get_latest_finding('lab_analysis_complete') or {}
         lab_values = lab_summary.get('key_values', {})
+        pneumonia_on_imaging = blackboard.has_alert('pneumonia_confirmed_on_imaging')
         
         # Initialize risk assessment
         risk_assessment = {
@@ -59,13 +130,14 @@ class IntelligentRiskStratificationAgent:
         }
         
         # 1. Calculate all relevant clinical scores
-        await self._calculate_clinical_scores(patient_data, vitals, lab_values, risk_assessment)
+        await self._calculate_clinical_scores(patient_data, vitals, lab_values, risk_assessment,
+                                              pneumonia_on_imaging)
         
         # 2. Consider agent findings
         await self._incorporate_agent_findings(risk_assessment)
         
         # 3. Calculate overall risk
-        self._determine_overall_risk(risk_assessment)
+        self._determine_overall_risk(risk_assessment, lab_values)
         
         # 4. Make recommendations
         self._generate_recommendations(risk_assessment)
@@ -74,12 +146,13 @@ class IntelligentRiskStratificationAgent:
         await self._communicate_risk_assessment(risk_assessment)
         
         # 6. Debate if there are conflicting findings
-        await self._debate_risk_level(risk_assessment)
+        await self._debate_risk_level(risk_assessment, lab_summary, pneumonia_on_imaging)
         
         return risk_assessment
     
     async def _calculate_clinical_scores(self, patient_data: Dict, vitals: Dict, 
-                                       lab_values: Dict, risk_assessment: Dict):
+                                       lab_values: Dict, risk_assessment: Dict,
+                                       pneumonia_on_imaging: bool):
         """
         Calculate all relevant medical scores
         """
@@ -108,7 +181,7 @@ class IntelligentRiskStratificationAgent:
             print(f"[{self.name}] 🚨 MEWS indicates high risk of deterioration")
         
         # CURB-65 if pneumonia suspected
-        if blackboard.has_alert('pneumonia_confirmed_on_imaging'):
+        if pneumonia_on_imaging:
             curb65 = self.medical_intel.calculate_curb65(patient_data, vitals, lab_values)
             risk_assessment['clinical_scores']['CURB-65'] = curb65
             
@@ -144,16 +217,15 @@ class IntelligentRiskStratificationAgent:
         # Check for critical lab values
         critical_labs = blackboard.get_knowledge('critical_lab_alert')
         if critical_labs:
-            for alert in critical_labs:
-                self.risk_factors.append(f"Critical lab: {alert['content']['finding']}")
+            self.risk_factors.extend(f"Critical lab: {alert['content']['finding']}" for alert in critical_labs)
+            self._critical_lab_count += len(critical_labs)
         
         # Check imaging findings
         xray_complete = blackboard.get_latest_finding('xray_analysis_complete')
         if xray_complete:
-            impression = xray_complete.get('impression', '')
-            if 'pneumonia' in impression.lower():
+            if _PNEUMONIA_RE.search(xray_complete.get('impression', '')):
                 self.risk_factors.append("Pneumonia confirmed on imaging")
-            if 'bilateral' in str(xray_complete.get('key_findings', [])).lower():
+            if any(_BILATERAL_RE.search(str(finding)) for finding in xray_complete.get('key_findings', [])):
                 self.risk_factors.append("Bilateral lung involvement - higher severity")
         
         # Age-based risk
@@ -167,20 +239,17 @@ class IntelligentRiskStratificationAgent:
         medical_history = self.patient_data.get('medical_history', {})
         chronic_conditions = medical_history.get('chronic_conditions', [])
         
-        high_risk_conditions = ['diabetes', 'heart failure', 'copd', 'kidney disease', 'immunosuppression']
         for condition in chronic_conditions:
-            if any(risk in condition.lower() for risk in high_risk_conditions):
+            if _HIGH_RISK_CONDITIONS_RE.search(condition):
                 self.risk_factors.append(f"Comorbidity: {condition}")
         
         risk_assessment['risk_factors'] = self.risk_factors
     
-    def _determine_overall_risk(self, risk_assessment: Dict):
+    def _determine_overall_risk(self, risk_assessment: Dict, lab_values: Dict):
         """
         Determine overall risk level from all factors
         """
         # First check for CRITICAL lab values
-        lab_summary = blackboard.get_latest_finding('lab_analysis_complete') or {}
-        lab_values = lab_summary.get('key_values', {})
         crp = lab_values.get('crp', 0)
         wbc = lab_values.get('wbc', 0)
         lactate = lab_values.get('lactate', 0)
@@ -222,7 +291,7 @@ class IntelligentRiskStratificationAgent:
                 critical_count += 2
         
         # Check critical labs
-        if any('Critical lab' in factor for factor in self.risk_factors):
+        if self._critical_lab_count:
             critical_count += 1
         
         # Determine overall risk
@@ -241,54 +310,12 @@ class IntelligentRiskStratificationAgent:
         """
         Generate risk-based recommendations
         """
-        risk_level = risk_assessment['overall_risk']
-        
-        if risk_level == RiskLevel.CRITICAL:
-            risk_assessment['disposition'] = "ICU admission required"
-            risk_assessment['monitoring_level'] = "Continuous monitoring"
-            risk_assessment['recommendations'] = [
-                "IMMEDIATE ICU transfer",
-                "Continuous cardiac and O2 monitoring",
-                "Arterial line for BP monitoring",
-                "Central line access",
-                "Prepare for intubation if needed",
-                "Initiate appropriate protocols (sepsis, ACS, etc.)",
-                "Notify critical care team"
-            ]
-            
-        elif risk_level == RiskLevel.HIGH:
-            risk_assessment['disposition'] = "Admit to step-down/telemetry unit"
-            risk_assessment['monitoring_level'] = "Enhanced monitoring"
-            risk_assessment['recommendations'] = [
-                "Admit to monitored bed",
-                "Vital signs q2h",
-                "Continuous pulse oximetry",
-                "Daily labs",
-                "Rapid response team awareness",
-                "Consider ICU if deteriorates"
-            ]
-            
-        elif risk_level == RiskLevel.MODERATE:
-            risk_assessment['disposition'] = "Admit to medical floor"
-            risk_assessment['monitoring_level'] = "Standard monitoring"
-            risk_assessment['recommendations'] = [
-                "Admit for observation",
-                "Vital signs q4h",
-                "Daily labs",
-                "Monitor response to treatment",
-                "Consider discharge in 24-48h if improving"
-            ]
-            
-        else:  # LOW
-            risk_assessment['disposition'] = "Consider discharge with close follow-up"
-            risk_assessment['monitoring_level'] = "Outpatient"
-            risk_assessment['recommendations'] = [
-                "Discharge home if stable",
-                "Primary care follow-up in 24-48 hours",
-                "Return precautions given",
-                "Home monitoring instructions",
-                "Clear discharge criteria met"
-            ]
+        disposition, monitoring_level, recommendations = _RISK_PLANS.get(
+            risk_assessment['overall_risk'], _RISK_PLANS[RiskLevel.LOW]
+        )
+        risk_assessment['disposition'] = disposition
+        risk_assessment['monitoring_level'] = monitoring_level
+        risk_assessment['recommendations'] = list(recommendations)
     
     async def _communicate_risk_assessment(self, risk_assessment: Dict):
         """
@@ -305,15 +332,14 @@ class IntelligentRiskStratificationAgent:
             }
         }
         
-        await blackboard.post(
-            self.agent_id,
+        events = [(
             MessageType.FINDING,
             "risk_assessment_complete",
             summary,
             Priority.HIGH if risk_assessment['overall_risk'] in [RiskLevel.HIGH, RiskLevel.CRITICAL] else Priority.NORMAL
-        )
+        )]
         
-        # Post opinion for consensus
+        # Post opinion for consensus - before the batch so alert handlers already see it
         opinion = f"Risk level is {risk_assessment['overall_risk'].value}. "
         opinion += f"Recommend: {risk_assessment['disposition']}"
         
@@ -328,8 +354,7 @@ class IntelligentRiskStratificationAgent:
         if risk_assessment['overall_risk'] == RiskLevel.CRITICAL:
             print(f"[{self.name}] 🚨 CRITICAL RISK - Alerting all agents!")
             
-            await blackboard.post(
-                self.agent_id,
+            events.append((
                 MessageType.ALERT,
                 "patient_critical",
                 {
@@ -338,17 +363,17 @@ class IntelligentRiskStratificationAgent:
                     'evidence': self.risk_factors[:3]
                 },
                 Priority.CRITICAL
-            )
+            ))
+        
+        await blackboard.post_many(self.agent_id, events)
     
-    async def _debate_risk_level(self, risk_assessment: Dict):
+    async def _debate_risk_level(self, risk_assessment: Dict, lab_summary: Dict,
+                                 pneumonia_on_imaging: bool):
         """
         Debate risk level if there are conflicting findings
         """
-        # Check if other agents disagree
-        lab_patterns = blackboard.get_latest_finding('lab_analysis_complete')
-        
         # Example: If labs show minor abnormalities but scores are high
-        if lab_patterns and lab_patterns.get('critical_count', 0) == 0 and \
+        if lab_summary and lab_summary.get('critical_count', 0) == 0 and \
            risk_assessment['overall_risk'] in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
             
             await blackboard.ask_question(
@@ -359,8 +384,7 @@ class IntelligentRiskStratificationAgent:
             )
         
         # If pneumonia but low risk scores
-        if blackboard.has_alert('pneumonia_confirmed_on_imaging') and \
-           risk_assessment['overall_risk'] == RiskLevel.LOW:
+        if pneumonia_on_imaging and risk_assessment['overall_risk'] == RiskLevel.LOW:
             
             print(f"[{self.name}] 🤔 Interesting - pneumonia confirmed but risk scores are low...")
             
@@ -388,7 +412,8 @@ class IntelligentRiskStratificationAgent:
         # React to critical findings
         elif topic.startswith("critical_"):
             print(f"[{self.name}] 🚨 Critical finding received - re-evaluating risk...")
-            self.risk_factors.append(f"Critical alert: {topic}")
+            if len(self.risk_factors) < _MAX_RISK_FACTORS:
+                self.risk_factors.append(f"Critical alert: {topic}")
             
         # React to sepsis alert
         elif topic == "sepsis_suspected":
@@ -403,7 +428,7 @@ class IntelligentRiskStratificationAgent:
             )
         
         # Respond to questions
-        elif topic.startswith("question_") and self.agent_id in str(message.get('target_agents', [])):
+        elif topic.startswith("question_") and self.agent_id in (message.get('target_agents') or ()):
             question = message.get('content', '')
             
             if "aggressive management" in question:
@@ -0,0 +1,58 @@
+"""
+Fixed-shape sections of the patient view
+Built as slotted dataclasses and turned into dicts only when the view is returned
+"""
+from typing import Dict, List, Sequence
+from dataclasses import dataclass, field, fields
+
+def _to_dict(section) -> Dict:
+    """Shallow dict of a section - nested lists/dicts are handed over as is"""
+    return {f.name: getattr(section, f.name) for f in fields(section)}
+
+@dataclass(slots=True)
+class AlertData:
+    """Emergency alert banner"""
+    show_alert: bool
+    severity: str
+    title: str
+    message: str
+    urgency_reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return _to_dict(self)
+
+@dataclass(slots=True)
+class AdmissionData:
+    """Hospital admission details"""
+    needs_admission: bool
+    admission_type: str
+    expected_stay: str
+    reasons: List[str] = field(default_factory=list)
+    what_to_expect: Sequence[str] = field(default_factory=list)
+    daily_plan: Dict = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return _to_dict(self)
+
+@dataclass(slots=True)
+class CostData:
+    """Cost estimate shown to the patient"""
+    total_estimated: float
+    breakdown: Dict
+    insurance_estimate: Dict
+    financial_options: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return _to_dict(self)
+
+@dataclass(slots=True)
+class OptionsData:
+    """Treatment options and what to ask or watch for"""
+    recommended_action: str
+    treatment_approach: str
+    alternatives: List[str] = field(default_factory=list)
+    questions_for_doctor: List[str] = field(default_factory=list)
+    red_flags: Sequence[str] = ()
+
+    def to_dict(self) -> Dict:
+        return _to_dict(self)
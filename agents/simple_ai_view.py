@@ -1,18 +1,48 @@
 """Simple AI View - Fallback that always works"""
+from functools import lru_cache
+
+# (total estimate, with insurance) per care tier
+_COSTS = {
+    'critical': (15000, 3000),
+    'admission': (8000, 1600),
+    'outpatient': (2000, 400)
+}
+
+_GENERAL_QUESTIONS = (
+    "What are the expected outcomes?",
+    "Are there alternative treatments?",
+    "What are the risks and side effects?"
+)
+
+_RED_FLAGS = (
+    "Difficulty breathing",
+    "Chest pain",
+    "High fever",
+    "Confusion"
+)
 
 async def generate_ai_patient_view(analysis_results):
     """Generate patient view without AI dependencies"""
     
     consensus = analysis_results.get('consensus', {})
-    patient = analysis_results.get('patient', {})
     
-    diagnosis = consensus.get('primary_diagnosis', 'Unknown condition')
-    disposition = consensus.get('disposition', 'See your doctor')
-    confidence = consensus.get('confidence_level', 'MODERATE')
+    return _build_view(
+        consensus.get('primary_diagnosis', 'Unknown condition'),
+        consensus.get('disposition', 'See your doctor'),
+        consensus.get('confidence_level', 'MODERATE')
+    )
+
+# The view depends only on these three strings, so repeat consults reuse it.
+# Callers serialize the result straight into the response - treat it as read-only
+@lru_cache(maxsize=256)
+def _build_view(diagnosis: str, disposition: str, confidence: str) -> dict:
+    """Build the fallback view for one diagnosis / disposition / confidence"""
     
     # Determine severity
     is_critical = 'ICU' in disposition or 'CRITICAL' in confidence
     is_admission = 'Admit' in disposition
+    tier = 'critical' if is_critical else 'admission' if is_admission else 'outpatient'
+    total_estimated, with_insurance = _COSTS[tier]
     
     return {
         "success": True,
@@ -37,9 +67,9 @@ async def generate_ai_patient_view(analysis_results):
             ]
         },
         "cost": {
-            "total_estimated": 15000 if is_critical else 8000 if is_admission else 2000,
+            "total_estimated": total_estimated,
             "insurance_estimate": {
-                "with_insurance": 3000 if is_critical else 1600 if is_admission else 400,
+                "with_insurance": with_insurance,
                 "coverage_note": "Typical insurance covers 80%"
             }
         },
@@ -47,15 +77,8 @@ async def generate_ai_patient_view(analysis_results):
             "recommended_action": disposition,
             "questions_for_doctor": [
                 f"What is the treatment plan for {diagnosis}?",
-                "What are the expected outcomes?",
-                "Are there alternative treatments?",
-                "What are the risks and side effects?"
+                *_GENERAL_QUESTIONS
             ],
-            "red_flags": [
-                "Difficulty breathing",
-                "Chest pain",
-                "High fever",
-                "Confusion"
-            ]
+            "red_flags": _RED_FLAGS
         }
     }
@@ -31,9 +31,14 @@ class EnhancedBlackboard:
         self.knowledge_base = {}
         self.conversation_log = []
         self.active_alerts = []
+        self.critical_count = 0  # Kept in step with active_alerts so callers needn't scan them
+        self._alert_topics = set()  # Topics of active_alerts, for has_alert
         
         # Agent communication
         self.subscribers = defaultdict(list)
+        # Subscription index - exact topics are a dict hit, only wildcards are scanned
+        self._pattern_order = {}  # pattern -> order it was first subscribed
+        self._wildcard_patterns = []  # (pattern, prefix, suffix)
         self.agent_responses = defaultdict(list)
         self.pending_questions = []
         
@@ -51,15 +56,40 @@ class EnhancedBlackboard:
         - "*_critical" - all critical events
         """
         for pattern in event_patterns:
+            if pattern not in self._pattern_order:
+                self._index_pattern(pattern)
             self.subscribers[pattern].append({
                 'agent_id': agent_id,
                 'callback': callback
             })
     
-    async def post(self, agent_id: str, message_type: MessageType, 
-                   topic: str, content: Any, priority: Priority = Priority.NORMAL):
+    def _index_pattern(self, pattern: str):
         """
-        Post a message that other agents can respond to
+        Register a new subscription pattern with the index
+        """
+        self._pattern_order[pattern] = len(self._pattern_order)
+        if pattern.endswith('*'):
+            self._wildcard_patterns.append((pattern, pattern[:-1], None))
+        elif pattern.startswith('*'):
+            self._wildcard_patterns.append((pattern, None, pattern[1:]))
+    
+    def _matching_patterns(self, topic: str) -> List[str]:
+        """
+        Subscribed patterns matching topic, in subscription order
+        """
+        matched = [
+            pattern for pattern, prefix, suffix in self._wildcard_patterns
+            if (topic.startswith(prefix) if prefix is not None else topic.endswith(suffix))
+        ]
+        if topic in self._pattern_order and topic not in matched:
+            matched.append(topic)
+            matched.sort(key=self._pattern_order.__getitem__)
+        return matched
+    
+    def _record(self, agent_id: str, message_type: MessageType,
+                topic: str, content: Any, priority: Priority) -> Dict:
+        """
+        Put a message on the board (log, knowledge base, alerts) without notifying anyone
         """
         message = {
             'id': f"{agent_id}_{datetime.now().timestamp()}",
@@ -82,14 +112,39 @@ class EnhancedBlackboard:
         # Handle critical alerts
         if priority == Priority.CRITICAL:
             self.active_alerts.append(message)
+            self.critical_count += 1
+            self._alert_topics.add(topic)
             print(f"\n🚨 CRITICAL ALERT from {agent_id}: {topic}")
         
+        return message
+    
+    async def post(self, agent_id: str, message_type: MessageType, 
+                   topic: str, content: Any, priority: Priority = Priority.NORMAL):
+        """
+        Post a message that other agents can respond to
+        """
+        message = self._record(agent_id, message_type, topic, content, priority)
+        
         # Notify subscribers
         await self._notify_subscribers(topic, message)
         
         # Log the communication
         self._log_communication(agent_id, topic, content, priority)
     
+    async def post_many(self, agent_id: str, events: List[tuple]):
+        """
+        Post several messages from one agent as a batch
+        
+        events are (message_type, topic, content, priority) tuples. Every
+        message is on the board before the first subscriber is notified, so
+        handlers see the whole batch.
+        """
+        messages = [self._record(agent_id, *event) for event in events]
+        
+        for (message_type, topic, content, priority), message in zip(events, messages):
+            await self._notify_subscribers(topic, message)
+            self._log_communication(agent_id, topic, content, priority)
+    
     async def ask_question(self, agent_id: str, question: str, target_agents: List[str] = None):
         """
         Agent asks a question to other agents
@@ -151,6 +206,13 @@ class EnhancedBlackboard:
         if len(self.agent_opinions[topic]) >= 3:
             self._attempt_consensus(topic)
     
+    def post_opinions(self, agent_id: str, opinions: List[tuple]):
+        """
+        Post several (topic, opinion, confidence) opinions from one agent
+        """
+        for topic, opinion, confidence in opinions:
+            self.post_opinion(agent_id, topic, opinion, confidence)
+    
     def _attempt_consensus(self, topic: str):
         """
         Try to build consensus from agent opinions
@@ -192,36 +254,23 @@ class EnhancedBlackboard:
         """
         notified_agents = set()
         
-        for pattern, subscribers in self.subscribers.items():
-            if self._matches_pattern(topic, pattern):
-                for subscriber in subscribers:
-                    agent_id = subscriber['agent_id']
+        for pattern in self._matching_patterns(topic):
+            for subscriber in self.subscribers[pattern]:
+                agent_id = subscriber['agent_id']
+                
+                # Don't notify the sender
+                if agent_id != message['agent_id'] and agent_id not in notified_agents:
+                    callback = subscriber['callback']
                     
-                    # Don't notify the sender
-                    if agent_id != message['agent_id'] and agent_id not in notified_agents:
-                        callback = subscriber['callback']
+                    try:
+                        # Call the agent's callback
+                        result = callback(topic, message)
+                        if asyncio.iscoroutine(result):
+                            await result
                         
-                        try:
-                            # Call the agent's callback
-                            result = callback(topic, message)
-                            if asyncio.iscoroutine(result):
-                                await result
-                            
-                            notified_agents.add(agent_id)
-                        except Exception as e:
-                            print(f"Error notifying {agent_id}: {e}")
-    
-    def _matches_pattern(self, topic: str, pattern: str) -> bool:
-        """
-        Check if topic matches subscription pattern
-        """
-        if pattern == topic:
-            return True
-        if pattern.endswith('*'):
-            return topic.startswith(pattern[:-1])
-        if pattern.startswith('*'):
-            return topic.endswith(pattern[1:])
-        return False
+                        notified_agents.add(agent_id)
+                    except Exception as e:
+                        print(f"Error notifying {agent_id}: {e}")
     
     def _log_communication(self, agent_id: str, topic: str, content: Any, priority: Priority):
         """
@@ -251,11 +300,21 @@ class EnhancedBlackboard:
             return knowledge[-1]['content']
         return None
     
+    def get_latest_findings(self, topics: List[str]) -> Dict[str, Any]:
+        """
+        Get the most recent finding for each topic (None where nothing was posted)
+        """
+        knowledge_base = self.knowledge_base
+        return {
+            topic: knowledge_base[topic][-1]['content'] if knowledge_base.get(topic) else None
+            for topic in topics
+        }
+    
     def has_alert(self, alert_type: str) -> bool:
         """
         Check if there's an active alert
         """
-        return any(alert['topic'] == alert_type for alert in self.active_alerts)
+        return alert_type in self._alert_topics
     
     def get_agent_conversation(self, agent_id: str = None) -> List[Dict]:
         """
@@ -272,6 +331,8 @@ class EnhancedBlackboard:
         self.knowledge_base.clear()
         self.conversation_log.clear()
         self.active_alerts.clear()
+        self.critical_count = 0
+        self._alert_topics.clear()
         self.agent_opinions.clear()
         self.consensus_topics.clear()
         self.pending_questions.clear()
@@ -10,12 +10,13 @@ import asyncio
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
 
 # FastAPI imports
 from fastapi import FastAPI, UploadFile, File, Request, WebSocket, WebSocketDisconnect, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 import uvicorn
 
 # Add project root to path
@@ -312,7 +313,8 @@ class IntelligentOrchestrator:
 
 # ============= FASTAPI APP =============
 
-app = FastAPI(title="Intelligent Healthcare Multi-Agent System")
+# orjson serializes the large nested analysis / patient view payloads much faster than stdlib json
+app = FastAPI(title="Intelligent Healthcare Multi-Agent System", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -326,6 +328,16 @@ app.add_middleware(
 # Static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Blocking work (hybrid consistency checks, patient views) is pushed to
+# threads with asyncio.to_thread - size that pool explicitly
+THREAD_POOL_WORKERS = int(os.getenv("THREAD_POOL_WORKERS", 16))
+
+@app.on_event("startup")
+async def configure_thread_pool():
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREAD_POOL_WORKERS, thread_name_prefix="healthcare-worker")
+    )
+
 # Initialize orchestrator
 orchestrator = IntelligentOrchestrator()
 
@@ -547,7 +559,7 @@ async def get_patient_view(analysis_results: Dict = Body(...)):
                     try:
                         from agents.fixed_ai_patient_view import generate_ai_patient_view
                         print("🤖 Using FIXED AI patient view")
-                        return await generate_ai_patient_view(analysis_results)
+                        return generate_ai_patient_view(analysis_results)
                     except Exception as e:
                         print(f"⚠️  Fixed AI failed: {e}")
                         # Fallback to simple version that ALWAYS works
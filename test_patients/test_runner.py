@@ -10,6 +10,12 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+# uvloop ships with uvicorn[standard] - the server already runs on it, so use it here too
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -207,4 +213,6 @@ async def main():
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
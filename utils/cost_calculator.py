@@ -2,6 +2,7 @@
 Unified Cost Estimation Module
 Ensures consistent cost calculations across all views
 """
+from functools import lru_cache
 
 def calculate_hospital_cost(risk_level: str, diagnosis: str, age: int, los_days: int) -> dict:
     """
@@ -16,7 +17,20 @@ def calculate_hospital_cost(risk_level: str, diagnosis: str, age: int, los_days:
     Returns:
         Dictionary with cost breakdown
     """
-    
+    # Same case is costed by several views - reuse the cached result but hand
+    # out fresh nested dicts so callers can't mutate the cache
+    cost_data = _calculate_hospital_cost(risk_level, diagnosis, age, los_days)
+    return {
+        **cost_data,
+        "breakdown": dict(cost_data["breakdown"]),
+        "insurance_estimate": dict(cost_data["insurance_estimate"])
+    }
+
+@lru_cache(maxsize=1024)
+def _calculate_hospital_cost(risk_level: str, diagnosis: str, age: int, los_days: int) -> dict:
+    """
+    Cached cost computation behind calculate_hospital_cost
+    """
     # Base daily rates by risk level
     daily_rates = {
         "CRITICAL": 3500,
@@ -70,7 +84,7 @@ def calculate_hospital_cost(risk_level: str, diagnosis: str, age: int, los_days:
         "total_estimated": age_adjusted_total,
         "breakdown": {
             f"Hospital Care ({los_days} days @ ${daily_rate}/day)": room_and_board,
-            f"{diagnosis.split()[0]} Treatment": diagnosis_specific,
+            f"{(diagnosis.split() or ['General'])[0]} Treatment": diagnosis_specific,
             "Tests & Monitoring": int(base_cost * 0.3)  # 30% of base for tests
         },
         "insurance_estimate": {
@@ -81,6 +95,7 @@ def calculate_hospital_cost(risk_level: str, diagnosis: str, age: int, los_days:
         "length_of_stay": los_days
     }
 
+@lru_cache(maxsize=1024)
 def estimate_length_of_stay(risk_level: str, diagnosis: str) -> int:
     """
     Estimate length of stay based on risk and diagnosis
@@ -96,9 +111,10 @@ def estimate_length_of_stay(risk_level: str, diagnosis: str) -> int:
     los = base_los.get(risk_level, 3)
     
     # Adjust for specific conditions
-    if "sepsis" in diagnosis.lower() and risk_level == "CRITICAL":
+    diagnosis_lower = diagnosis.lower()
+    if "sepsis" in diagnosis_lower and risk_level == "CRITICAL":
         los = 10
-    elif "pneumonia" in diagnosis.lower() and risk_level == "HIGH":
+    elif "pneumonia" in diagnosis_lower and risk_level == "HIGH":
         los = 6
     
     return los
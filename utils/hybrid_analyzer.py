@@ -4,8 +4,9 @@ Hybrid Medical Analysis System - Combines AI intelligence with deterministic con
 import json
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 import os
+import threading
 from utils.cost_calculator import calculate_hospital_cost, estimate_length_of_stay
 
 class HybridMedicalAnalyzer:
@@ -16,6 +17,10 @@ class HybridMedicalAnalyzer:
     def __init__(self, cache_file="analysis_cache.json"):
         self.cache_file = cache_file
         self.cache = self._load_cache()
+        self._patient_index: Optional[Dict[str, List[str]]] = None  # patient_id -> cache keys, built on first use
+        # Patient views call analyze_with_consistency from worker threads - guards
+        # the cache, the patient index and the cache file
+        self._lock = threading.Lock()
         
     def _load_cache(self) -> Dict:
         """Load analysis cache from file"""
@@ -32,6 +37,23 @@ class HybridMedicalAnalyzer:
         with open(self.cache_file, 'w') as f:
             json.dump(self.cache, f, indent=2)
     
+    def _index_entry(self, cache_key: str, entry: Dict):
+        """Record a cache entry under its patient (older entries carry no patient_id)"""
+        patient_id = entry.get('patient_id')
+        if patient_id is not None:
+            self._patient_index.setdefault(str(patient_id), []).append(cache_key)
+    
+    def get_patient_analyses(self, patient_id: str) -> List[tuple]:
+        """
+        (cache_key, entry) pairs for one patient's cached analyses
+        """
+        with self._lock:
+            if self._patient_index is None:
+                self._patient_index = {}
+                for cache_key, entry in self.cache.items():
+                    self._index_entry(cache_key, entry)
+            return [(key, self.cache[key]) for key in self._patient_index.get(str(patient_id), [])]
+    
     def _generate_cache_key(self, patient_data: Dict, files_hash: str) -> str:
         """Generate consistent cache key for patient + date"""
         # Include patient ID, age, chief complaint, and date
@@ -57,8 +79,9 @@ class HybridMedicalAnalyzer:
         cache_key = self._generate_cache_key(patient_data, files_hash)
         
         # Check cache first (24-hour validity)
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
+        with self._lock:
+            cached = self.cache.get(cache_key)
+        if cached is not None:
             cache_time = datetime.fromisoformat(cached['timestamp'])
             if datetime.now() - cache_time < timedelta(hours=24):
                 print(f"🔄 Using cached analysis for consistency")
@@ -86,11 +109,16 @@ class HybridMedicalAnalyzer:
         }
         
         # Cache the result
-        self.cache[cache_key] = {
-            'timestamp': datetime.now().isoformat(),
-            'analysis': enhanced_analysis
-        }
-        self._save_cache()
+        with self._lock:
+            is_new = cache_key not in self.cache
+            self.cache[cache_key] = {
+                'timestamp': datetime.now().isoformat(),
+                'patient_id': patient_data.get('patient_id'),
+                'analysis': enhanced_analysis
+            }
+            if is_new and self._patient_index is not None:
+                self._index_entry(cache_key, self.cache[cache_key])
+            self._save_cache()
         
         return enhanced_analysis
     